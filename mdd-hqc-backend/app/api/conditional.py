@@ -0,0 +1,200 @@
+"""Conditional and cached responses for deterministic pipeline results."""
+
+import json
+import logging
+from typing import (
+    Annotated,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+)
+
+from fastapi import Depends, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.schemas.path import PathRequest
+from app.core.cache import LruCache
+from app.core.config import config
+from app.core.executors import run_in_io_executor
+from app.core.hashing import file_content_hash
+from app.services.pipeline import response_etag
+
+logger = logging.getLogger(__name__)
+
+# ------------ Rendered Responses ------------
+# Process-wide cache of rendered response bodies keyed by their ETag.
+response_body_cache = LruCache(
+    name="responses",
+    max_entries=config.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=config.RESPONSE_CACHE_MAX_BYTES,
+)
+
+# Media types of the rendered bodies.
+JSON_MEDIA_TYPE = "application/json"
+TEXT_MEDIA_TYPE = "text/plain; charset=utf-8"
+
+
+# ====== Private Helpers ======
+# Internal functions below compare the client tags with the current one.
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Returns whether an `If-None-Match` header names the current ETag.
+
+    Tags are compared weakly, as RFC 9110 requires for `If-None-Match`, so `W/"abc"`
+    and `"abc"` match each other in either direction, and `*` matches any current
+    result.
+    """
+    if not if_none_match:
+        return False
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return True
+    return False
+
+
+def _encode_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    """Encodes streamed text chunks as UTF-8 one at a time."""
+    for chunk in chunks:
+        yield chunk.encode("utf-8")
+
+
+def _tagged_response(etag: str, body: bytes, media_type: str) -> Response:
+    """Returns one rendered body with its ETag header."""
+    return Response(content=body, media_type=media_type, headers={"ETag": etag})
+
+
+# ====== Public API ======
+# Functions below tag, short-circuit, and render the responses of one endpoint.
+
+
+class VaryOnEncodingMiddleware:
+    """Adds `Vary: Accept-Encoding` to every response that carries an `ETag`.
+
+    The gzip middleware only sets `Vary` on the bodies it compresses, so the
+    uncompressed body and the 304 of the same tag would reach shared caches without
+    it. Added after `GZipMiddleware`, this middleware wraps it and sees the final
+    headers, so the header is never listed twice.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """Wraps the ASGI application whose tagged responses get the header."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Passes the request through and edits the headers of a tagged response."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_vary(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                vary = headers.get("vary", "")
+                if "etag" in headers and "accept-encoding" not in vary.lower():
+                    headers.add_vary_header("Accept-Encoding")
+            await send(message)
+
+        await self.app(scope, receive, send_with_vary)
+
+
+async def input_content_hash(request: PathRequest) -> str:
+    """Returns the content hash of the input file of one request.
+
+    FastAPI caches dependency values per request, so `conditional_result` and an
+    endpoint that both declare this dependency share one hash, which the endpoint then
+    passes to the pipeline instead of hashing the file again.
+    """
+    try:
+        return await run_in_io_executor(file_content_hash, request.path)
+    except OSError as exc:
+        logger.warning("Input hash failed: input_path=%s, error=%s", request.path, exc)
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def conditional_result(endpoint: str) -> Callable[..., Awaitable[str]]:
+    """Returns a dependency that tags the response of `endpoint` and honors 304.
+
+    The dependency only hashes the input file, which the content hash memo answers
+    from one `stat` call when the file is unchanged. When the client already holds the
+    current tag it answers 304 before the model is loaded or any stage runs; otherwise
+    it sets the `ETag` header and returns the tag. The query string is part of the tag,
+    so variants such as metadata-only responses never share one. Declare it before
+    dependencies that load the model, so it runs first.
+    """
+
+    async def check_etag(
+        request: PathRequest,
+        http_request: Request,
+        response: Response,
+        xml_hash: Annotated[str, Depends(input_content_hash)],
+        if_none_match: Annotated[Optional[str], Header()] = None,
+    ) -> str:
+        variant = f"{endpoint}?{http_request.url.query}"
+        etag = response_etag(variant, request.path, xml_hash)
+        if _etag_matches(if_none_match, etag):
+            logger.info(
+                "Result not modified: endpoint=%s, input_path=%s, etag=%s",
+                endpoint,
+                request.path,
+                etag,
+            )
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+
+        response.headers["ETag"] = etag
+        return etag
+
+    return check_etag
+
+
+def cached_response(etag: str) -> Optional[Response]:
+    """Returns the rendered body stored under one ETag, or None when it is not cached.
+
+    A hit skips the pipeline and JSON encoding entirely, since the tag names the exact
+    bytes of the response.
+    """
+    cached = response_body_cache.get(etag)
+    if cached is None:
+        return None
+    body, media_type = cached
+    return _tagged_response(etag, body, media_type)
+
+
+def json_response(etag: str, payload: Dict[str, Any]) -> Response:
+    """Renders one JSON payload, caches the body under its ETag, and returns it.
+
+    Payloads hold only JSON-native values, so they are encoded in one `json.dumps`
+    call without FastAPI's `jsonable_encoder` walk.
+    """
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+    response_body_cache.put(etag, (body, JSON_MEDIA_TYPE), size=len(body))
+    return _tagged_response(etag, body, JSON_MEDIA_TYPE)
+
+
+def text_response(etag: str, text: str) -> Response:
+    """Returns one artifact text as UTF-8 plain text and caches it under its ETag."""
+    body = text.encode("utf-8")
+    response_body_cache.put(etag, (body, TEXT_MEDIA_TYPE), size=len(body))
+    return _tagged_response(etag, body, TEXT_MEDIA_TYPE)
+
+
+def text_stream_response(etag: str, chunks: Iterable[str]) -> StreamingResponse:
+    """Streams one artifact text as UTF-8 plain text without caching it.
+
+    The chunks are produced and encoded one at a time on the threadpool while the body
+    is sent, so neither the whole text nor its encoded body is held in memory. The body
+    is not stored in the response cache, whose byte budget a huge artifact would fill.
+    """
+    return StreamingResponse(
+        _encode_chunks(chunks), media_type=TEXT_MEDIA_TYPE, headers={"ETag": etag}
+    )
@@ -1,39 +1,88 @@
 """File endpoints used to upload XML artifacts into the backend workspace."""
 
 import logging
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from app.services.upload_service import UploadService
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from app.core.config import config
+from app.services.upload_service import (
+    UploadService,
+    UploadTooLargeError,
+    UploadValidationError,
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/files", tags=["files"])
 
+# ------------ Upload Schema ------------
+# OpenAPI body of the upload endpoint, which parses the multipart stream itself.
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "required": ["file"],
+                "properties": {"file": {"type": "string", "format": "binary"}},
+            }
+        }
+    },
+}
+
 
-@router.post("/upload")
+@router.post("/upload", openapi_extra={"requestBody": UPLOAD_REQUEST_BODY})
 async def upload_file(
-    file: Annotated[UploadFile, File(...)],
+    request: Request,
     upload_service: Annotated[UploadService, Depends(UploadService)],
+    preindex: Optional[bool] = None,
 ):
     """Uploads one XML file and stores it in the backend data directory.
 
     This endpoint is used at the start of the pipeline when a source XML model must be
-    persisted before parsing or transformation begins.
+    persisted before parsing or transformation begins. The multipart body is streamed
+    to disk instead of being spooled first, uploads over `UPLOAD_MAX_BYTES` get 413,
+    and the returned `id` is the content hash, so repeated uploads of one model share
+    its stored file and cached pipeline stages. With `preindex` (default
+    `UPLOAD_PREINDEX`) the file is also validated as an iStar model before it is
+    stored, rejected with 422 when it is not one, and its indexes and CIM metrics are persisted and returned, so
+    the first transformation skips parsing.
     """
-    logger.info("File upload requested: filename=%s", file.filename)
+    logger.info(
+        "File upload requested: content_length=%s",
+        request.headers.get("content-length"),
+    )
     try:
-        saved_path = await upload_service.upload_file(file)
-    except ValueError as exc:
-        logger.warning(
-            "File upload rejected: filename=%s, error=%s", file.filename, exc
+        upload = await upload_service.upload_stream(
+            request.headers,
+            request.stream(),
+            preindex=config.UPLOAD_PREINDEX if preindex is None else preindex,
         )
+    except UploadTooLargeError as exc:
+        logger.warning("File upload rejected: error=%s", exc)
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except UploadValidationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except ValueError as exc:
+        logger.warning("File upload rejected: error=%s", exc)
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
+    metrics = None
+    if upload.cim_metrics is not None:
+        metrics = {"cim": upload.cim_metrics}
+
     logger.info(
-        "File uploaded successfully: filename=%s, path=%s", file.filename, saved_path
+        "File uploaded successfully: filename=%s, path=%s, id=%s",
+        upload.filename,
+        upload.path,
+        upload.id,
     )
     return {
         "detail": "Archivo subido correctamente",
-        "filename": file.filename,
-        "path": str(saved_path),
+        "filename": upload.filename,
+        "path": str(upload.path),
+        "id": upload.id,
+        "size": upload.size,
+        "deduplicated": upload.deduplicated,
+        "metrics": metrics,
     }
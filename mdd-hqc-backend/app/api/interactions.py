@@ -5,8 +5,11 @@ from pathlib import Path
 from fastapi import APIRouter, HTTPException
 
 from app.api.schemas.path import PathRequest
+from app.core.executors import run_in_io_executor
+from app.core.storage import wait_for_artifact
 from app.models.llm_contract import InteractionInput, InteractionReport
 from app.models.llm_contract import UvlModel
+from app.services.artifacts.uvl_parser import load_uvl_model
 from app.services.artifacts.uvl_service import UvlService
 from app.services.interaction.service import run_interaction
 
@@ -18,16 +21,18 @@ async def get_interaction_report(request: PathRequest):
     """Builds the interaction report for the UVL file referenced by the request path.
 
     This endpoint loads the current UVL draft and runs the interaction workflow so the
-    caller can inspect pending questions or proposals.
+    caller can inspect pending questions or proposals. The draft comes from the UVL
+    parse cache, so an unchanged file is neither read nor parsed again.
     """
     uvl_path = Path(request.path)
+    await wait_for_artifact(uvl_path)
     if not uvl_path.exists():
         raise HTTPException(status_code=404, detail=f"No se encontró UVL en {uvl_path}")
 
     try:
-        uvl_content = uvl_path.read_text(encoding="utf-8")
+        parsed, uvl = await run_in_io_executor(load_uvl_model, str(uvl_path))
         service = UvlService()
-        uvl_dict = service.parse_uvl_to_dict(uvl_content)
+        uvl_dict = service.uvl_model_to_dict(parsed, uvl)
         uvl_model = UvlModel(**uvl_dict)
 
         payload = InteractionInput(nodes=[], links=[], uvl=uvl_model)
@@ -43,16 +48,18 @@ async def get_functionality_names(request: PathRequest):
     """Returns the direct functionality names extracted from the requested UVL file.
 
     This endpoint exposes a lightweight view of the functionality block so the caller can
-    reuse the declared names without parsing the whole UVL artifact.
+    reuse the declared names without parsing the whole UVL artifact. The names come
+    from the cached UVL model, so an unchanged file is not read again.
     """
     uvl_path = Path(request.path)
+    await wait_for_artifact(uvl_path)
     if not uvl_path.exists():
         raise HTTPException(status_code=404, detail=f"No se encontró UVL en {uvl_path}")
 
     try:
-        uvl_content = uvl_path.read_text(encoding="utf-8")
+        parsed, uvl = await run_in_io_executor(load_uvl_model, str(uvl_path))
         service = UvlService()
-        subfunciones = service.extract_functionality_names(uvl_content)
+        subfunciones = service.functionality_names(parsed, uvl)
         return {f"subfuncion_{i + 1}": nombre for i, nombre in enumerate(subfunciones)}
 
     except Exception as exc:
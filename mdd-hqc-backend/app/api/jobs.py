@@ -0,0 +1,91 @@
+"""Job endpoints that run transformation flows in the background."""
+
+import logging
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.api.schemas.job import JobRequest
+from app.core.storage import wait_for_artifact
+from app.services.jobs import ARTIFACT_LINKS, JobQueueFullError, job_manager
+
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.post("", status_code=202)
+async def submit_job(request: JobRequest):
+    """Queues one transformation flow and returns the job record to poll.
+
+    This endpoint returns right away, so large models never hold the HTTP connection
+    open for the whole pipeline. Submissions beyond the queue depth are rejected with
+    429 instead of piling up unbounded work.
+    """
+    logger.info(
+        "Job submission requested: kind=%s, input_path=%s", request.kind, request.path
+    )
+    try:
+        job = await job_manager.submit(request.kind, request.path)
+    except JobQueueFullError as exc:
+        logger.warning(
+            "Job submission rejected: input_path=%s, error=%s", request.path, exc
+        )
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
+
+    return {"detail": "Trabajo encolado", "job": job}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Returns the status, stage progress, and result links of one job.
+
+    The `result` field holds the same payload as the synchronous transformation
+    endpoint once the job succeeds; after a restart it omits the artifact texts,
+    which stay available through the `result_uvl` and `result_puml` links.
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return {"detail": "Estado del trabajo", "job": job}
+
+
+@router.get("/{job_id}/{artifact}")
+async def get_job_artifact(job_id: str, artifact: str):
+    """Returns one artifact produced by a succeeded job as plain text.
+
+    This endpoint backs the `result_uvl` and `result_puml` links of the job record, so
+    clients never receive server filesystem paths to fetch results from.
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+
+    field = ARTIFACT_LINKS.get(artifact)
+    path = (
+        (job.result or {}).get(field) if field and job.status == "succeeded" else None
+    )
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artefacto no disponible")
+
+    artifact_path = Path(path)
+    await wait_for_artifact(artifact_path)
+    if not artifact_path.is_file():
+        raise HTTPException(status_code=404, detail="Artefacto no disponible")
+    return FileResponse(artifact_path, media_type="text/plain; charset=utf-8")
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancels one queued or running job and returns its record.
+
+    Finished jobs are returned unchanged, so repeating the request is harmless. A
+    server process other than the job host forwards the request, and the returned
+    record still shows the status before the cancellation.
+    """
+    job = await job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    logger.info("Job cancellation requested: job_id=%s, status=%s", job_id, job.status)
+    return {"detail": "Cancelación solicitada", "job": job}
@@ -5,59 +5,58 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
 
+from app.api.conditional import (
+    cached_response,
+    conditional_result,
+    input_content_hash,
+    json_response,
+    response_body_cache,
+)
 from app.api.schemas.path import PathRequest
-from app.models.istar import IstarModel
-from app.services.artifacts.xml_service import XmlService
-from app.services.metrics.istar_metrics import IstarMetricsService
+from app.core.hashing import content_hash_cache
+from app.core.labels import label_normalizer
+from app.services.artifacts.uvl_parser import uvl_model_cache
+from app.services.artifacts.xml_service import istar_model_cache
+from app.services.pipeline import pipeline_stage_cache, run_cim_metrics
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
 
-def get_xml_service(request: PathRequest) -> IstarModel:
-    """Builds the parsed iStar model required by the metrics dependency chain.
-
-    This dependency loads the XML artifact once so the metrics endpoint can reuse the
-    same parsed model during request handling.
-    """
-    return XmlService(request.path)
-
-
-def get_istar_metrics_service(
-    xml_service: Annotated[IstarModel, Depends(get_xml_service)],
-) -> IstarMetricsService:
-    """Builds the CIM metrics service for the current parsed iStar model.
-
-    This dependency keeps the endpoint wiring small by creating the metrics service only
-    after the XML model has already been parsed.
-    """
-    return IstarMetricsService(xml_service)
-
-
 @router.post("/cim")
 async def get_cim_metrics(
     request: PathRequest,
-    metrics_service: Annotated[IstarMetricsService, Depends(get_istar_metrics_service)],
+    etag: Annotated[str, Depends(conditional_result("cim-metrics"))],
+    xml_hash: Annotated[str, Depends(input_content_hash)],
 ):
     """Calculates and returns the CIM metrics for the XML file in the request.
 
     This endpoint is used when the caller needs a structural summary of the parsed iStar
-    model without running the full transformation pipeline.
+    model without running the full transformation pipeline. A client sending the
+    current `ETag` in `If-None-Match` gets 304, and a response already rendered for
+    the tag is returned from the response cache. Otherwise the metrics come from the
+    CIM-to-PIM stage, cached or run on the CPU executor, so this endpoint and the
+    transformations parse one upload once.
     """
     logger.info("CIM metrics requested: input_path=%s", request.path)
+    if (cached := cached_response(etag)) is not None:
+        return cached
     try:
-        istar_metrics = metrics_service.calculate()
+        istar_metrics = await run_cim_metrics(request.path, xml_hash=xml_hash)
         logger.info(
             "CIM metrics calculated successfully: input_path=%s, total_nodes=%s, total_links=%s",
             request.path,
             istar_metrics.get("total_nodes"),
             istar_metrics.get("total_links"),
         )
-        return {
-            "detail": "Métricas CIM calculadas",
-            "input_xml": request.path,
-            "metrics": {"cim": istar_metrics},
-        }
+        return json_response(
+            etag,
+            {
+                "detail": "Métricas CIM calculadas",
+                "input_xml": request.path,
+                "metrics": {"cim": istar_metrics},
+            },
+        )
     except Exception as exc:
         logger.error(
             "CIM metrics calculation failed: input_path=%s, error=%s",
@@ -66,3 +65,29 @@ async def get_cim_metrics(
             exc_info=True,
         )
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/cache")
+async def get_cache_metrics():
+    """Returns the size and hit/miss counters of the backend caches.
+
+    This endpoint lets operators check whether repeated requests over the same XML file
+    are being served without parsing it again, and how often labels are normalized
+    from scratch. The counters cover only the API process that answers the request;
+    each other server process keeps its own caches. XML files are parsed by the
+    CIM-to-PIM stage, which both `/metrics/cim` and the transformations go through, so
+    `pipeline_stages` shows whether a request reused an earlier parse. That parse runs
+    in a CPU executor worker, so `istar_models` only counts it when
+    `CPU_EXECUTOR_WORKERS` is 0 and stages run in this process.
+    """
+    return {
+        "detail": "Estadísticas de caché",
+        "caches": {
+            "istar_models": istar_model_cache.stats(),
+            "uvl_models": uvl_model_cache.stats(),
+            "pipeline_stages": pipeline_stage_cache.stats(),
+            "responses": response_body_cache.stats(),
+            "content_hashes": content_hash_cache.stats(),
+            **label_normalizer.stats(),
+        },
+    }
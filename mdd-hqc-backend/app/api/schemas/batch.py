@@ -0,0 +1,19 @@
+"""Request schemas for batch transformations over many XML files."""
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.services.pipeline import FlowKind
+
+
+class BatchRequest(BaseModel):
+    """Carries the XML files and the transformation flow of one batch.
+
+    Files come from `paths`, from the XML members of the ZIP file at `archive`, or
+    from both, so a nightly run can send one archive instead of hundreds of calls.
+    """
+
+    paths: List[str] = []
+    archive: Optional[str] = None
+    kind: FlowKind = "pim-to-psm"
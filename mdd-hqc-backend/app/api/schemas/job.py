@@ -0,0 +1,14 @@
+"""Request schemas for the background job API."""
+
+from app.api.schemas.path import PathRequest
+from app.services.pipeline import FlowKind
+
+
+class JobRequest(PathRequest):
+    """Carries the XML path and the transformation flow one background job should run.
+
+    The flow names match the synchronous transformation endpoints, so a caller can move
+    a slow request to the job API without changing its payload beyond `kind`.
+    """
+
+    kind: FlowKind = "pim-to-psm"
@@ -1,71 +1,139 @@
 """Transformation endpoints that expose the CIM-to-PIM and PIM-to-PSM flows."""
 
+import asyncio
+import json
 import logging
-from pathlib import Path
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, Dict, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 
+from app.api.conditional import (
+    cached_response,
+    conditional_result,
+    input_content_hash,
+    json_response,
+    text_response,
+    text_stream_response,
+)
+from app.api.schemas.batch import BatchRequest
 from app.api.schemas.path import PathRequest
-from app.models.uvl import UVL
+from app.core.config import config
+from app.services.batch import BatchInputError, resolve_batch_inputs, run_batch
+from app.services.pipeline import (
+    StageCallback,
+    StageEvent,
+    run_pim_stages,
+    run_psm_stages,
+)
 
-from app.services.artifacts.xml_service import XmlService
-from app.services.artifacts.uvl_service import UvlService
-from app.services.artifacts.plantuml_service import PlantumlService
 
-from app.services.transformations.cim_to_pim import CimToPim
-from app.services.transformations.pim_to_psm import PimToPsm
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/transformations", tags=["transformations"])
 
-from app.services.metrics.istar_metrics import IstarMetricsService
-from app.services.metrics.uvl_metrics import UvlMetricsService
-from app.services.metrics.uml_metrics import UmlMetricsService
+# Media type of the streaming endpoints: one JSON object per line.
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 
-logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/transformations", tags=["transformations"])
+def _ndjson_line(payload: Dict[str, Any]) -> bytes:
+    """Encodes one streamed event as a UTF-8 JSON line."""
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
 
 
-@router.post("/cim-to-pim")
-async def transform_cim_pim(request: PathRequest):
-    """Runs the CIM-to-PIM flow and returns the generated UVL artifact plus metrics.
+async def _stream_pipeline(
+    run_stages: Callable[..., Awaitable[Any]],
+    input_path: str,
+    detail: str,
+    flow_name: str,
+) -> AsyncIterator[bytes]:
+    """Runs one flow in the background and yields its stage events as NDJSON lines.
 
-    This endpoint parses the source XML, applies the CIM-to-PIM rules, and exposes the
-    resulting UVL model together with the relevant CIM and PIM summaries.
+    Every `StageEvent` becomes a `{"event": "stage", ...}` line as soon as the pipeline
+    emits it. The last line is either `{"event": "result", ...}` with the same fields
+    as the non-streaming endpoint or `{"event": "error", "detail": ...}`, since the
+    HTTP status is already sent when the flow fails. A client that disconnects cancels
+    the flow.
     """
-    logger.info("CIM-to-PIM transformation requested: input_path=%s", request.path)
+    events: "asyncio.Queue[Optional[StageEvent]]" = asyncio.Queue()
+    on_stage: StageCallback = events.put_nowait
+
+    async def run() -> Any:
+        try:
+            return await run_stages(input_path, on_stage=on_stage)
+        finally:
+            events.put_nowait(None)
+
+    task = asyncio.create_task(run())
     try:
-        xml_service = XmlService(request.path)
-        uvl_service = UvlService()
-        uvl = UVL()
+        while (event := await events.get()) is not None:
+            yield _ndjson_line({"event": "stage", **event.model_dump()})
 
-        istar_metrics = IstarMetricsService(xml_service).calculate()
+        try:
+            result = await task
+        except Exception as exc:
+            logger.error(
+                "%s streamed transformation failed: input_path=%s, error=%s",
+                flow_name,
+                input_path,
+                exc,
+                exc_info=True,
+            )
+            yield _ndjson_line({"event": "error", "detail": str(exc)})
+            return
 
-        cim_to_pim = CimToPim(xml_service=xml_service, uvl_service=uvl_service, uvl=uvl)
-        cim_to_pim.apply_r1()
-        cim_to_pim.apply_r2()
-        cim_to_pim.apply_r4()
-        cim_to_pim.apply_r5()
-        cim_to_pim.apply_r3()
-        uvl.create_file()
+        logger.info(
+            "%s streamed transformation completed: input_path=%s", flow_name, input_path
+        )
+        yield _ndjson_line(
+            {"event": "result", "detail": detail, **result.to_payload(input_path)}
+        )
+    finally:
+        if not task.done():
+            task.cancel()
+            logger.info(
+                "%s streamed transformation cancelled: input_path=%s",
+                flow_name,
+                input_path,
+            )
 
-        uvl_metrics = UvlMetricsService(uvl).calculate()
 
-        uvl_content = ""
-        if uvl.FILE_NAME.exists():
-            uvl_content = uvl.FILE_NAME.read_text(encoding="utf-8")
+@router.post("/cim-to-pim")
+async def transform_cim_pim(
+    request: PathRequest,
+    etag: Annotated[str, Depends(conditional_result("cim-to-pim"))],
+    xml_hash: Annotated[str, Depends(input_content_hash)],
+    include_content: bool = True,
+):
+    """Runs the CIM-to-PIM flow and returns the generated UVL artifact plus metrics.
+
+    This endpoint parses the source XML, applies the CIM-to-PIM rules, and exposes the
+    resulting UVL model together with the relevant CIM and PIM summaries. Parsing and
+    the rules run on the CPU executor, so the event loop keeps serving other requests
+    meanwhile. The UVL text is returned from memory and its file is written in the
+    background. A cached run over the same XML content is reused. The response carries
+    a weak `ETag`, and a client sending it back in `If-None-Match` gets 304 without
+    the flow running. With `include_content=false` the UVL text is left out and can be
+    fetched from `/transformations/cim-to-pim/uvl`.
+    """
+    logger.info("CIM-to-PIM transformation requested: input_path=%s", request.path)
+    if (cached := cached_response(etag)) is not None:
+        return cached
+    try:
+        result = await run_pim_stages(request.path, xml_hash=xml_hash)
 
         logger.info(
             "CIM-to-PIM transformation completed: input_path=%s, output_uvl=%s, features=%s",
             request.path,
-            uvl.FILE_NAME,
-            uvl_metrics.get("total_features"),
+            result.uvl_path,
+            result.pim.uvl_metrics.get("total_features"),
+        )
+        return json_response(
+            etag,
+            {
+                "detail": "Transformación CIM -> PIM completada",
+                **result.to_payload(request.path, include_content),
+            },
         )
-        return {
-            "detail": "Transformación CIM -> PIM completada",
-            "input_xml": request.path,
-            "output_uvl": str(uvl.FILE_NAME),
-            "uvl_content": uvl_content,
-            "metrics": {"cim": istar_metrics, "pim": uvl_metrics},
-        }
     except Exception as exc:
         logger.error(
             "CIM-to-PIM transformation failed: input_path=%s, error=%s",
@@ -77,72 +145,181 @@ async def transform_cim_pim(request: PathRequest):
 
 
 @router.post("/pim-to-psm")
-async def transform_pim_psm(request: PathRequest):
+async def transform_pim_psm(
+    request: PathRequest,
+    etag: Annotated[str, Depends(conditional_result("pim-to-psm"))],
+    xml_hash: Annotated[str, Depends(input_content_hash)],
+    include_content: bool = True,
+):
     """Runs the full PIM-to-PSM flow and returns the UVL and PlantUML artifacts.
 
     This endpoint executes both transformation stages so the caller receives the
-    generated UVL, the final UML artifact, and the metrics of each stage.
+    generated UVL, the final UML artifact, and the metrics of each stage. Each stage
+    resumes from the pipeline cache when the same XML content was already processed,
+    so a call after `/cim-to-pim` skips parsing and the CIM-to-PIM rules. Like
+    `/cim-to-pim`, it answers 304 when `If-None-Match` holds the current `ETag`, and
+    `include_content=false` leaves out both texts, which
+    `/transformations/pim-to-psm/puml` and `/transformations/cim-to-pim/uvl` serve.
     """
     logger.info("PIM-to-PSM transformation requested: input_path=%s", request.path)
+    if (cached := cached_response(etag)) is not None:
+        return cached
     try:
-        xml_service = XmlService(request.path)
-        uvl_service = UvlService()
-        uvl = UVL()
-
-        istar_metrics = IstarMetricsService(xml_service).calculate()
-
-        cim_to_pim = CimToPim(xml_service=xml_service, uvl_service=uvl_service, uvl=uvl)
-        cim_to_pim.apply_r1()
-        cim_to_pim.apply_r2()
-        cim_to_pim.apply_r4()
-        cim_to_pim.apply_r5()
-        cim_to_pim.apply_r3()
-        uvl.create_file()
+        result = await run_psm_stages(request.path, xml_hash=xml_hash)
 
-        uvl_metrics = UvlMetricsService(uvl).calculate()
-
-        pim_to_psm = PimToPsm(uvl)
-        uml_model = pim_to_psm.transform()
-
-        uml_metrics = UmlMetricsService(uml_model).calculate()
+        logger.info(
+            "PIM-to-PSM transformation completed: input_path=%s, output_uvl=%s, output_puml=%s, classes=%s",
+            request.path,
+            result.uvl_path,
+            result.puml_path,
+            result.uml.uml_metrics.get("total_classes"),
+        )
+        return json_response(
+            etag,
+            {
+                "detail": "Transformación PIM -> PSM completada",
+                **result.to_payload(request.path, include_content),
+            },
+        )
+    except Exception as exc:
+        logger.error(
+            "PIM-to-PSM transformation failed: input_path=%s, error=%s",
+            request.path,
+            exc,
+            exc_info=True,
+        )
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-        uml_output = Path("data/model.puml")
-        plantuml_service = PlantumlService()
-        uml_path = plantuml_service.write(uml_model, uml_output)
 
-        uvl_content = ""
-        if uvl.FILE_NAME.exists():
-            uvl_content = uvl.FILE_NAME.read_text(encoding="utf-8")
+@router.post("/cim-to-pim/uvl")
+async def get_uvl_artifact(
+    request: PathRequest,
+    etag: Annotated[str, Depends(conditional_result("uvl"))],
+    xml_hash: Annotated[str, Depends(input_content_hash)],
+):
+    """Returns the UVL text of one XML file as plain text.
 
-        uml_content = ""
-        if uml_path.exists():
-            uml_content = uml_path.read_text(encoding="utf-8")
+    This endpoint pairs with the metadata-only transformation responses: the text comes
+    from the pipeline cache, or from running the CIM-to-PIM flow when it is not cached,
+    and carries its own `ETag`. Models with at least `UVL_STREAM_MIN_FEATURES` features
+    are streamed in chunks from the UVL model instead of being sent as one body.
+    """
+    logger.info("UVL artifact requested: input_path=%s", request.path)
+    if (cached := cached_response(etag)) is not None:
+        return cached
+    try:
+        result = await run_pim_stages(request.path, xml_hash=xml_hash)
+    except Exception as exc:
+        logger.error(
+            "UVL artifact failed: input_path=%s, error=%s",
+            request.path,
+            exc,
+            exc_info=True,
+        )
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
+    uvl = result.pim.uvl
+    if len(uvl.features) >= config.UVL_STREAM_MIN_FEATURES:
         logger.info(
-            "PIM-to-PSM transformation completed: input_path=%s, output_uvl=%s, output_puml=%s, classes=%s",
+            "UVL artifact streamed: input_path=%s, features=%s",
             request.path,
-            uvl.FILE_NAME,
-            uml_path,
-            uml_metrics.get("total_classes"),
+            len(uvl.features),
         )
-        return {
-            "detail": "Transformación PIM -> PSM completada",
-            "input_xml": request.path,
-            "output_uvl": str(uvl.FILE_NAME),
-            "output_puml": str(uml_path),
-            "uvl_content": uvl_content,
-            "puml_content": uml_content,
-            "metrics": {
-                "cim": istar_metrics,
-                "pim": uvl_metrics,
-                "psm": uml_metrics,
-            },
-        }
+        return text_stream_response(etag, uvl.iter_chunks())
+    return text_response(etag, result.uvl_content)
+
+
+@router.post("/pim-to-psm/puml")
+async def get_puml_artifact(
+    request: PathRequest,
+    etag: Annotated[str, Depends(conditional_result("puml"))],
+    xml_hash: Annotated[str, Depends(input_content_hash)],
+):
+    """Returns the PlantUML text of one XML file as plain text.
+
+    Like `/transformations/cim-to-pim/uvl`, the text comes from the pipeline cache or
+    from running the full PIM-to-PSM flow, and carries its own `ETag`.
+    """
+    logger.info("PlantUML artifact requested: input_path=%s", request.path)
+    if (cached := cached_response(etag)) is not None:
+        return cached
+    try:
+        result = await run_psm_stages(request.path, xml_hash=xml_hash)
     except Exception as exc:
         logger.error(
-            "PIM-to-PSM transformation failed: input_path=%s, error=%s",
+            "PlantUML artifact failed: input_path=%s, error=%s",
             request.path,
             exc,
             exc_info=True,
         )
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return text_response(etag, result.puml_text)
+
+
+@router.post("/cim-to-pim/stream")
+async def stream_cim_pim(request: PathRequest):
+    """Runs the CIM-to-PIM flow and streams one NDJSON event per stage and rule.
+
+    Each event carries the stage timing and, for transformation stages, the metrics
+    known so far, so the frontend can show progress and slow rules are visible. The
+    last line holds the same result as `/transformations/cim-to-pim`.
+    """
+    logger.info(
+        "CIM-to-PIM streamed transformation requested: input_path=%s", request.path
+    )
+    return StreamingResponse(
+        _stream_pipeline(
+            run_pim_stages,
+            request.path,
+            "Transformación CIM -> PIM completada",
+            "CIM-to-PIM",
+        ),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.post("/pim-to-psm/stream")
+async def stream_pim_psm(request: PathRequest):
+    """Runs the full PIM-to-PSM flow and streams one NDJSON event per stage and rule.
+
+    Events cover the parse, each CIM-to-PIM rule and the UVL render, the UVL artifact,
+    each PIM-to-PSM rule, and the PlantUML render and artifact. The last line holds the same result as
+    `/transformations/pim-to-psm`.
+    """
+    logger.info(
+        "PIM-to-PSM streamed transformation requested: input_path=%s", request.path
+    )
+    return StreamingResponse(
+        _stream_pipeline(
+            run_psm_stages,
+            request.path,
+            "Transformación PIM -> PSM completada",
+            "PIM-to-PSM",
+        ),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.post("/batch")
+async def transform_batch(request: BatchRequest):
+    """Runs one transformation flow over many XML files and returns per-file results.
+
+    Files from `paths` and from the optional ZIP `archive` fan out over the shared CPU
+    executor with bounded concurrency. A failing file is reported in its own result
+    without aborting the batch, and the response adds up the counts of every
+    succeeded file. Artifact contents are not inlined; each result links to its files.
+    """
+    logger.info(
+        "Batch transformation requested: kind=%s, paths=%s, archive=%s",
+        request.kind,
+        len(request.paths),
+        request.archive,
+    )
+    try:
+        input_paths = await resolve_batch_inputs(request.paths, request.archive)
+    except BatchInputError as exc:
+        logger.warning("Batch transformation rejected: error=%s", exc)
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    batch = await run_batch(request.kind, input_paths)
+    return {"detail": "Transformación por lotes completada", **batch.model_dump()}
@@ -0,0 +1,79 @@
+"""Command-line entry point that runs batch transformations without the HTTP server.
+
+Usage: `python -m app.batch_cli [--kind pim-to-psm] [--archive models.zip]
+[--output report.json] [paths ...]`. The exit code is 0 when every file succeeded,
+1 when some file failed, and 2 when the batch inputs are invalid.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import List, Optional
+
+from app.core.executors import shutdown_executors
+from app.core.logging.logging import setup_logging
+from app.core.storage import flush_artifact_writes
+from app.services.batch import (
+    BatchInputError,
+    BatchResult,
+    resolve_batch_inputs,
+    run_batch,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    """Parses the command-line options of one batch run."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.batch_cli",
+        description="Runs a CIM-to-PIM or PIM-to-PSM transformation over many XML files.",
+    )
+    parser.add_argument("paths", nargs="*", help="XML files to transform")
+    parser.add_argument("--archive", help="ZIP file whose XML members are transformed")
+    parser.add_argument(
+        "--kind", choices=("cim-to-pim", "pim-to-psm"), default="pim-to-psm"
+    )
+    parser.add_argument(
+        "--max-concurrency", type=int, help="Files in flight at the same time"
+    )
+    parser.add_argument(
+        "--output", help="Writes the JSON report here instead of stdout"
+    )
+    return parser.parse_args(argv)
+
+
+async def _run(args: argparse.Namespace) -> BatchResult:
+    """Resolves the inputs of one batch, runs it, and waits for its artifact files."""
+    input_paths = await resolve_batch_inputs(args.paths, args.archive)
+    batch = await run_batch(args.kind, input_paths, args.max_concurrency)
+    await flush_artifact_writes()
+    return batch
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs one batch, writes its JSON report, and returns the process exit code."""
+    setup_logging()
+    args = _parse_args(argv)
+    try:
+        batch = asyncio.run(_run(args))
+    except BatchInputError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    finally:
+        shutdown_executors()
+
+    report = json.dumps(batch.model_dump(), ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+        logger.info("Batch report written: output=%s", args.output)
+    else:
+        print(report)
+    return 1 if batch.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
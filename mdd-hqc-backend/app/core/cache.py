@@ -0,0 +1,147 @@
+"""Thread-safe LRU cache with entry and byte budgets shared by backend services."""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LruCache:
+    """Keeps the most recently used values in memory under an entry and byte budget.
+
+    Each value is stored with the byte weight given by the caller, and the least recently
+    used entries are evicted until both budgets hold again. Hit and miss counters let the
+    owner report how effective the cache is.
+    """
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int):
+        """Initializes an empty cache with the given budgets.
+
+        A budget of zero or less disables that limit, and a cache with `max_entries`
+        set to zero stores nothing at all.
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    # ====== Private Helpers ======
+    # Internal methods below keep the budgets consistent; callers must hold the lock.
+
+    # ------------ Budget Enforcement ------------
+    # Methods below drop entries until the configured budgets are respected again.
+    def _evict_over_budget(self) -> None:
+        """Evicts least recently used entries while any budget is exceeded."""
+        while self._entries and self._is_over_budget():
+            _, (_, size) = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._evictions += 1
+
+    def _is_over_budget(self) -> bool:
+        """Returns `True` when the cache holds more entries or bytes than allowed."""
+        if 0 < self.max_entries < len(self._entries):
+            return True
+        return 0 < self.max_bytes < self._total_bytes
+
+    def _remove(self, key: Hashable) -> None:
+        """Removes one entry and releases its byte weight."""
+        _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+    # ====== Public API ======
+    # Methods below read, fill, and inspect the cache.
+
+    # ------------ Entry Access ------------
+    # Methods below look up and store cached values.
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for `key` and marks it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int = 0) -> None:
+        """Stores `value` under `key` with the given byte weight.
+
+        Values heavier than the whole byte budget are not stored, so one oversized
+        input cannot flush every other entry out of the cache.
+        """
+        if self.max_entries == 0:
+            return
+        if 0 < self.max_bytes < size:
+            logger.debug(
+                "Cache entry skipped: cache=%s, size=%s, max_bytes=%s",
+                self.name,
+                size,
+                self.max_bytes,
+            )
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+            self._evict_over_budget()
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        size: int = 0,
+    ) -> Any:
+        """Returns the cached value for `key`, loading and storing it on a miss.
+
+        The loader runs outside the lock, so a slow load never blocks lookups of other
+        keys.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = loader()
+        self.put(key, value, size)
+        return value
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Removes every entry whose key matches `predicate` and returns how many."""
+        with self._lock:
+            stale_keys = [key for key in self._entries if predicate(key)]
+            for key in stale_keys:
+                self._remove(key)
+            return len(stale_keys)
+
+    def clear(self) -> None:
+        """Removes every entry while keeping the hit and miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    # ------------ Statistics ------------
+    # Methods below expose the counters used to judge the cache effectiveness.
+    def stats(self) -> Dict[str, Any]:
+        """Returns the current size, budgets, and hit/miss counters of the cache."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
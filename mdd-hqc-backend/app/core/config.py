@@ -14,6 +14,39 @@ class Config(BaseSettings):
     LOG_MAX_BYTES: int = 10_485_760
     LOG_BACKUP_COUNT: int = 5
     BACKEND_CORS_ORIGINS: str = "http://localhost:3000"
+    XML_STREAMING_LOADER: bool = True
+    XML_PARALLEL_PAGES: bool = False
+    XML_PARSE_WORKERS: int = 0
+    ISTAR_CACHE_MAX_ENTRIES: int = 16
+    ISTAR_CACHE_MAX_BYTES: int = 268_435_456
+    LABEL_CACHE_MAX_ENTRIES: int = 65_536
+    CONTENT_HASH_CACHE_MAX_ENTRIES: int = 1024
+    PIPELINE_CACHE_MAX_ENTRIES: int = 48
+    PIPELINE_CACHE_MAX_BYTES: int = 268_435_456
+    UVL_CACHE_MAX_ENTRIES: int = 16
+    UVL_CACHE_MAX_BYTES: int = 268_435_456
+    ARTIFACTS_DIR: str = "data/artifacts"
+    ARTIFACTS_PERSIST: bool = True
+    UPLOADS_DIR: str = "data/uploads"
+    UPLOAD_MAX_BYTES: int = 104_857_600
+    UPLOAD_PREINDEX: bool = False
+    ISTAR_INDEX_DIR: str = "data/indexes"
+    IO_EXECUTOR_WORKERS: int = 8
+    CPU_EXECUTOR_WORKERS: int = 2
+    JOB_MAX_CONCURRENCY: int = 2
+    JOB_QUEUE_MAX_DEPTH: int = 32
+    JOB_HISTORY_MAX_ENTRIES: int = 256
+    JOBS_DIR: str = "data/jobs"
+    JOB_POLL_SECONDS: float = 1.0
+    BATCH_MAX_FILES: int = 1000
+    BATCH_MAX_CONCURRENCY: int = 4
+    BATCH_ARCHIVES_DIR: str = "data/batches"
+    BATCH_ARCHIVE_MAX_BYTES: int = 1_073_741_824
+    GZIP_MIN_BYTES: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 6
+    RESPONSE_CACHE_MAX_ENTRIES: int = 64
+    RESPONSE_CACHE_MAX_BYTES: int = 67_108_864
+    UVL_STREAM_MIN_FEATURES: int = 10_000
 
     @property
     def cors_origins(self) -> list[str]:
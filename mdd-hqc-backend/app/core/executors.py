@@ -0,0 +1,147 @@
+"""Shared executors that keep blocking pipeline stages off the event loop."""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# ------------ Executor Registry ------------
+# Pools are created on first use and reused by every request of the process.
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Set in the worker processes of the CPU pool, which must never start nested pools.
+_in_cpu_worker = False
+
+
+# ====== Private Helpers ======
+# Internal functions below create and reset the shared pools.
+
+
+# ------------ Pool Creation ------------
+# Functions below build each pool with the sizes configured in `Config`.
+def _mark_cpu_worker() -> None:
+    """Flags the current process as a worker of the shared CPU pool."""
+    global _in_cpu_worker
+
+    _in_cpu_worker = True
+
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    """Returns the shared thread pool, creating it on first use."""
+    global _io_executor
+
+    with _executor_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(
+                max_workers=config.IO_EXECUTOR_WORKERS,
+                thread_name_prefix="mdd-hqc-io",
+            )
+            logger.info("I/O executor started: workers=%s", config.IO_EXECUTOR_WORKERS)
+        return _io_executor
+
+
+def _get_cpu_executor() -> Executor:
+    """Returns the shared process pool, or the thread pool when processes are disabled.
+
+    Workers are spawned instead of forked, so they never inherit locks held by the
+    server threads at fork time.
+    """
+    global _cpu_executor
+
+    if config.CPU_EXECUTOR_WORKERS <= 0:
+        return _get_io_executor()
+
+    with _executor_lock:
+        if _cpu_executor is None:
+            _cpu_executor = ProcessPoolExecutor(
+                max_workers=config.CPU_EXECUTOR_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_mark_cpu_worker,
+            )
+            logger.info("CPU executor started: workers=%s", config.CPU_EXECUTOR_WORKERS)
+        return _cpu_executor
+
+
+def _reset_cpu_executor(broken: Executor) -> None:
+    """Drops a broken process pool so the next CPU stage starts a fresh one."""
+    global _cpu_executor
+
+    with _executor_lock:
+        if _cpu_executor is broken:
+            _cpu_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+# ====== Public API ======
+# Functions below run blocking stages on the shared pools and stop them on shutdown.
+
+
+# ------------ Stage Execution ------------
+# Functions below await one blocking call without holding the event loop.
+async def run_in_io_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs one blocking I/O stage on the shared thread pool and returns its result.
+
+    File reads and writes, and work over models already cached in this process, go
+    here so the event loop keeps serving other requests meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_io_executor(), partial(func, *args, **kwargs)
+    )
+
+
+async def run_in_cpu_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs one CPU-heavy stage on the shared process pool and returns its result.
+
+    `func`, its arguments, and its result must be picklable, so stages are module-level
+    functions that take paths and return plain models. A pool broken by a crashed
+    worker is replaced before the error reaches the caller.
+    """
+    executor = _get_cpu_executor()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+    except BrokenProcessPool:
+        logger.error("CPU executor broken, restarting on next stage")
+        _reset_cpu_executor(executor)
+        raise
+
+
+def get_shared_process_pool() -> Optional[Executor]:
+    """Returns the shared process pool for fan-out from blocking code, or None.
+
+    Blocking helpers that split one stage into picklable parts submit them here
+    instead of starting a pool of their own. None is returned inside a pool worker,
+    where a nested pool would oversubscribe the CPUs, and when processes are disabled,
+    so the caller runs its parts serially.
+    """
+    if _in_cpu_worker or config.CPU_EXECUTOR_WORKERS <= 0:
+        return None
+    return _get_cpu_executor()
+
+
+# ------------ Lifecycle ------------
+# Functions below release the pools when the application stops.
+def shutdown_executors() -> None:
+    """Stops both shared pools, waiting for running stages to finish."""
+    global _io_executor, _cpu_executor
+
+    with _executor_lock:
+        executors = [_cpu_executor, _io_executor]
+        _io_executor = None
+        _cpu_executor = None
+
+    for executor in executors:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    logger.info("Executors stopped")
@@ -0,0 +1,58 @@
+"""Content hashes of input files, memoized by path, mtime, and size."""
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Tuple
+
+from app.core.cache import LruCache
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# ------------ Hash Memo ------------
+# Process-wide memo that avoids rehashing files whose stat signature did not change.
+content_hash_cache = LruCache(
+    name="content_hashes",
+    max_entries=config.CONTENT_HASH_CACHE_MAX_ENTRIES,
+    max_bytes=0,
+)
+
+
+# ====== Private Helpers ======
+# Internal functions below build the memo key of one file.
+
+
+def _stat_key(path: Path) -> Tuple[str, int, int]:
+    """Returns the memo key of one file: its resolved path, mtime, and size."""
+    stat = path.stat()
+    return (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+# ====== Public API ======
+# Functions below return the content hash used to key derived artifacts.
+
+
+def file_content_hash(file_path: str) -> str:
+    """Returns the SHA-256 hex digest of one file, reusing the memoized digest.
+
+    Derived artifacts are keyed by this digest, so two paths holding the same bytes
+    share their cached results while any edit to the file produces a new key.
+    """
+    path = Path(file_path)
+
+    def hash_file() -> str:
+        with path.open("rb") as file:
+            digest = hashlib.file_digest(file, "sha256").hexdigest()
+        logger.debug("File hashed: path=%s, sha256=%s", file_path, digest)
+        return digest
+
+    return content_hash_cache.get_or_load(_stat_key(path), hash_file)
+
+
+def remember_content_hash(file_path: str, digest: str) -> None:
+    """Stores the digest of one file computed elsewhere, such as while it was uploaded.
+
+    The first pipeline run over the file then skips reading it just to hash it.
+    """
+    content_hash_cache.put(_stat_key(Path(file_path)), digest)
@@ -0,0 +1,97 @@
+"""Shared label normalization with precompiled patterns and memoized results."""
+
+import html
+import re
+import unicodedata
+from typing import Any, Dict, Optional
+
+from app.core.cache import LruCache
+from app.core.config import config
+
+# ------------ Label Patterns ------------
+# Patterns compiled once and reused by every normalization call.
+HTML_TAG_PATTERN = re.compile(r"<.*?>")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+NON_ALPHANUMERIC_PATTERN = re.compile(r"[^A-Za-z0-9\s]")
+
+
+class LabelNormalizer:
+    """Normalizes raw diagram labels and remembers the result for each raw label.
+
+    Labels repeat heavily across a diagram and across requests, so both the display
+    form used by the iStar model and the ASCII form used by UVL naming are memoized in
+    bounded caches whose hit rate can be reported.
+    """
+
+    def __init__(self, max_entries: int):
+        """Initializes the normalizer with one bounded cache per normalized form.
+
+        Setting `max_entries` to zero disables memoization while keeping the same
+        normalization results.
+        """
+        self._display_labels = LruCache(
+            name="display_labels", max_entries=max_entries, max_bytes=0
+        )
+        self._ascii_labels = LruCache(
+            name="ascii_labels", max_entries=max_entries, max_bytes=0
+        )
+
+    # ====== Private Helpers ======
+    # Internal methods below compute one normalized form without caching.
+
+    # ------------ Normalization Rules ------------
+    # Methods below hold the normalization rules shared by parser and UVL helpers.
+    def _compute_display_label(self, label: str) -> str:
+        """Removes HTML entities, tags, and repeated whitespace from one label."""
+        unescaped = html.unescape(label)
+        text = HTML_TAG_PATTERN.sub(" ", unescaped)
+        return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+    def _compute_ascii_text(self, text: str) -> str:
+        """Reduces one label to ASCII words separated by single spaces."""
+        normalized = unicodedata.normalize("NFKD", text)
+        ascii_text = normalized.encode("ascii", "ignore").decode("ascii")
+        cleaned = NON_ALPHANUMERIC_PATTERN.sub(" ", ascii_text)
+        return WHITESPACE_PATTERN.sub(" ", cleaned).strip()
+
+    # ====== Public API ======
+    # Methods below return memoized normalized labels and the cache statistics.
+
+    # ------------ Normalized Labels ------------
+    # Methods below return the normalized forms used across the backend.
+    def format_label(self, label: Optional[str]) -> Optional[str]:
+        """Returns the display form of a raw diagram label.
+
+        Empty labels are returned unchanged, so callers keep telling missing labels
+        apart from blank ones. For example, `"Pay&nbsp;<b>bill</b>"` becomes
+        `"Pay bill"`.
+        """
+        if not label:
+            return label
+        return self._display_labels.get_or_load(
+            label, lambda: self._compute_display_label(label)
+        )
+
+    def normalize_text(self, text: str) -> str:
+        """Returns the ASCII form of a label used for matching and UVL naming.
+
+        Accents are dropped and symbols become word separators. For example,
+        `"Optimización (QAOA)"` becomes `"Optimizacion QAOA"`.
+        """
+        return self._ascii_labels.get_or_load(
+            text, lambda: self._compute_ascii_text(text)
+        )
+
+    # ------------ Statistics ------------
+    # Methods below expose the memo cache counters.
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the size and hit/miss counters of both label caches."""
+        return {
+            "display_labels": self._display_labels.stats(),
+            "ascii_labels": self._ascii_labels.stats(),
+        }
+
+
+# ------------ Shared Normalizer ------------
+# Process-wide normalizer used by the iStar parser and the UVL naming helpers.
+label_normalizer = LabelNormalizer(max_entries=config.LABEL_CACHE_MAX_ENTRIES)
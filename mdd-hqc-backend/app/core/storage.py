@@ -0,0 +1,138 @@
+"""Filesystem helpers for atomic writes and content-addressed artifact paths."""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Dict, Iterator, Tuple
+
+from app.core.config import config
+from app.core.executors import run_in_io_executor
+
+logger = logging.getLogger(__name__)
+
+# ------------ Artifact Layout ------------
+# Root directory that holds one content-addressed directory per pipeline stage key.
+ARTIFACTS_DIR = Path(config.ARTIFACTS_DIR)
+
+# Permissions given to written files, matching a regular file under the default umask.
+ARTIFACT_FILE_MODE = 0o644
+
+# ------------ Deferred Writes ------------
+# Background artifact writes still running, keyed by absolute path.
+_pending_writes: Dict[Path, asyncio.Task] = {}
+
+
+# ====== Private Helpers ======
+# Internal functions below run and track background artifact writes.
+
+
+def _pending_key(path: Path) -> Path:
+    """Returns the key of one path in the pending-write registry without touching disk."""
+    return Path(os.path.abspath(path))
+
+
+def _write_if_missing(path: Path, content: str) -> Path:
+    """Writes one content-addressed artifact unless the file already exists."""
+    if not path.exists():
+        atomic_write_text(path, content)
+        logger.info("Artifact written: path=%s, bytes=%s", path, len(content))
+    return path
+
+
+def _forget_write(key: Path, task: asyncio.Task) -> None:
+    """Drops one finished write from the registry and logs its failure, if any."""
+    if _pending_writes.get(key) is task:
+        del _pending_writes[key]
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Artifact write failed: path=%s, error=%s", key, task.exception())
+
+
+# ====== Public API ======
+# Functions below write files atomically and resolve where artifacts are stored.
+
+
+# ------------ Atomic Writes ------------
+# Functions below write through a temporary sibling file that is renamed into place.
+@contextmanager
+def atomic_writer(
+    path: Path, encoding: str = "utf-8", binary: bool = False
+) -> Iterator[IO]:
+    """Yields a file handle whose content replaces `path` only when the block succeeds.
+
+    The content goes to a temporary file in the same directory and is renamed over
+    `path` at the end, so concurrent readers see either the old or the new file and
+    never a partial one. On error the temporary file is removed and `path` is untouched.
+    The handle is text unless `binary` is set.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        os.fchmod(fd, ARTIFACT_FILE_MODE)
+        mode, file_encoding = ("wb", None) if binary else ("w", encoding)
+        with os.fdopen(fd, mode, encoding=file_encoding) as file:
+            yield file
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(path: Path, content: str, encoding: str = "utf-8") -> Path:
+    """Writes `content` to `path` atomically and returns the path."""
+    with atomic_writer(path, encoding=encoding) as file:
+        file.write(content)
+    return path
+
+
+# ------------ Artifact Paths ------------
+# Functions below map stage keys to stable, collision-free directories.
+def artifact_dir(key: Tuple[str, ...]) -> Path:
+    """Returns the directory that stores the artifacts derived from one stage key.
+
+    The key holds the input content hash and the rule versions, so equal inputs share
+    one directory and concurrent jobs over different inputs never write the same file.
+    For example, `("pim", "<sha256>", "1")` maps to `data/artifacts/<32 hex chars>`.
+    """
+    digest = hashlib.sha256("\x1f".join(key).encode("utf-8")).hexdigest()
+    return ARTIFACTS_DIR / digest[:32]
+
+
+# ------------ Deferred Writes ------------
+# Functions below persist artifacts off the response path and wait for them on demand.
+def schedule_artifact_write(path: Path, content: str) -> None:
+    """Starts writing one content-addressed artifact in the background.
+
+    The caller already holds `content` and returns it without waiting for the disk.
+    A path that exists or is already being written is left alone, since equal paths
+    always hold equal content. Must be called from the running event loop.
+    """
+    key = _pending_key(path)
+    if key in _pending_writes:
+        return
+    task = asyncio.create_task(run_in_io_executor(_write_if_missing, path, content))
+    _pending_writes[key] = task
+    task.add_done_callback(lambda done: _forget_write(key, done))
+
+
+async def wait_for_artifact(path: Path) -> None:
+    """Waits until a background write of `path`, if any, has finished.
+
+    Endpoints that read an artifact path returned by an earlier response call this
+    first, so they never miss a file whose write is still running.
+    """
+    task = _pending_writes.get(_pending_key(path))
+    if task is not None:
+        await asyncio.wait({task})
+
+
+async def flush_artifact_writes() -> None:
+    """Waits for every background artifact write, for shutdown and offline runs."""
+    tasks = list(_pending_writes.values())
+    if tasks:
+        await asyncio.wait(tasks)
@@ -1,21 +1,45 @@
 """FastAPI application entry point for the MDD-HQC backend."""
 
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
+from app.api.conditional import VaryOnEncodingMiddleware
 from app.api.file import router as file_router
 from app.api.interactions import router as interactions_router
+from app.api.jobs import router as jobs_router
 from app.api.metrics import router as metrics_router
 from app.api.transformations import router as transformations_router
 from app.core.config import config
+from app.core.executors import shutdown_executors
 from app.core.logging.logging import setup_logging
+from app.core.storage import flush_artifact_writes
+from app.services.jobs import job_manager
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Runs the application and stops its background work when it shuts down.
+
+    The job manager joins the job host election at startup; the process that gets the
+    lock runs the persisted jobs, and every process serves the job API. At shutdown
+    job workers stop first, then pending artifact writes finish, then the
+    executors that run them are released.
+    """
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    await flush_artifact_writes()
+    shutdown_executors()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,8 +48,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=config.GZIP_MIN_BYTES,
+    compresslevel=config.GZIP_COMPRESS_LEVEL,
+)
+app.add_middleware(VaryOnEncodingMiddleware)
 
 app.include_router(file_router)
 app.include_router(metrics_router)
 app.include_router(transformations_router)
 app.include_router(interactions_router)
+app.include_router(jobs_router)
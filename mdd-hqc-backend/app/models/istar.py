@@ -7,19 +7,131 @@ Important:
 - Parsers/loaders (e.g. draw.io XML) live under services and populate this model.
 """
 
-import html
-import re
+import sys
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from app.core.labels import label_normalizer
+
+# ------------ Link Kinds ------------
+# Keys accepted by the adjacency queries, matching the draw.io `type` of each link.
+SOCIAL_DEPENDENCY = "dependency-link"
+NEEDED_BY = "needed-by"
+QUALIFICATION_LINK = "qualification-link"
+CONTRIBUTION = "contribution"
+REFINEMENT = "refinement"
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Returns the interned copy of a repeated string value, keeping `None` as is."""
+    if value is None:
+        return None
+    return sys.intern(value)
+
+
+# ------------ Stored Records ------------
+# Compact slotted records stored by the model instead of one dict per element or link.
+class IstarRecord:
+    """Gives slotted iStar records the read access of the dicts they replaced.
+
+    Services written against the former dict storage keep calling `get`, indexing by
+    field name, or `dict(record)`, while each record only stores its slots. For example,
+    `element.get("label")` and `element.label` return the same value.
+    """
+
+    __slots__ = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Returns the value of one field, or `default` when the record has no such key."""
+        if key in self.__dataclass_fields__:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        """Returns the value of one field, raising `KeyError` like a dict would."""
+        if key not in self.__dataclass_fields__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        """Returns `True` when `key` names one of the record fields."""
+        return key in self.__dataclass_fields__
+
+    def keys(self) -> Iterable[str]:
+        """Returns the field names in the same order as the former dict keys."""
+        return self.__dataclass_fields__.keys()
+
+
+@dataclass(slots=True)
+class IntentionalElement(IstarRecord):
+    """Stores one intentional element, with its repeated type and tag interned."""
+
+    id: str
+    type: str
+    tag: str
+    label: Optional[str]
+
+    def __post_init__(self) -> None:
+        """Interns the type and tag shared by many elements of the same diagram."""
+        self.type = _intern(self.type)
+        self.tag = _intern(self.tag)
+
+
+@dataclass(slots=True)
+class SocialDependency(IstarRecord):
+    """Stores one social dependency edge between two diagram nodes."""
+
+    id: str
+    source: Optional[str]
+    target: Optional[str]
+    label: Optional[str]
+
+
+@dataclass(slots=True)
+class InternalLink(IstarRecord):
+    """Stores one needed-by, qualification, or contribution link, with its type interned."""
+
+    id: str
+    type: str
+    source: Optional[str]
+    target: Optional[str]
+    label: Optional[str]
+
+    def __post_init__(self) -> None:
+        """Interns the link type shared by every link of the same kind."""
+        self.type = _intern(self.type)
+
+
+@dataclass(slots=True)
+class Refinement(IstarRecord):
+    """Stores one refinement edge, with its AND/OR value interned."""
+
+    id: str
+    source: Optional[str]
+    target: Optional[str]
+    value: Optional[str]
+
+    def __post_init__(self) -> None:
+        """Interns the refinement value shared by every edge of the same kind."""
+        self.value = _intern(self.value)
 
 
 class IstarModel:
     """In-memory representation of an iStar model.
 
     Storage is kept close to the current prototype needs:
-    - _intentional_elements : iStar intentional elements grouped by type, then by id.
-    - _social_dependencies  : social dependency edges (mxCell edges with source/target), keyed by id.
-    - _internal_links       : internal links (needed-by, qualification-link, contribution), keyed by id.
-    - _refinements          : refinement edges (type='refinement'), keyed by id.
+    - _intentional_elements : `IntentionalElement` records grouped by type, then by id.
+    - _social_dependencies  : `SocialDependency` records (mxCell edges with source/target), keyed by id.
+    - _internal_links       : `InternalLink` records (needed-by, qualification-link, contribution), keyed by id.
+    - _refinements          : `Refinement` records (type='refinement'), keyed by id.
     - _element_to_actor     : mapping {element_id: actor_label} for ownership resolution.
+
+    Lookup indexes derived from the storage above once loading finishes:
+    - _element_by_id        : flat mapping {element_id: element} across every type.
+    - _type_by_id           : flat mapping {element_id: element_type}.
+    - _links_by_kind        : every link grouped by kind, in storage order.
+    - _outgoing_links       : {source_id: {kind: [link, ...]}} adjacency lists.
+    - _incoming_links       : {target_id: {kind: [link, ...]}} adjacency lists.
     """
 
     def __init__(self) -> None:
@@ -34,6 +146,11 @@ class IstarModel:
         self._internal_links: dict = {}
         self._refinements: dict = {}
         self._element_to_actor: dict = {}
+        self._element_by_id: dict = {}
+        self._type_by_id: dict = {}
+        self._links_by_kind: dict = {}
+        self._outgoing_links: dict = {}
+        self._incoming_links: dict = {}
 
     # ====== Private Helpers ======
     # Internal methods that normalize stored values before public queries use them.
@@ -47,12 +164,65 @@ class IstarModel:
         queries can expose clean labels when other services inspect the parsed graph.
         """
 
-        if not label:
-            return label
-        unescaped = html.unescape(label)
-        text = re.sub(r"<.*?>", " ", unescaped)
-        text = re.sub(r"\s+", " ", text).strip()
-        return text
+        return label_normalizer.format_label(label)
+
+    # ------------ Lookup Indexes ------------
+    # Methods below derive constant-time lookups once the loader has filled the storage.
+    def _build_lookup_indexes(self) -> None:
+        """Builds the id and adjacency indexes from the stored elements and links.
+
+        Loaders call this once after indexing, so later queries resolve one id or the
+        links of one node in constant time instead of scanning the stored dicts.
+        """
+        self._index_elements_by_id()
+        self._index_links_by_node()
+
+    def _index_elements_by_id(self) -> None:
+        """Builds the flat id indexes from the intentional elements grouped by type.
+
+        When the same id is stored under several types, the first type group wins, as
+        the previous type-by-type scan did.
+        """
+        self._element_by_id = {}
+        self._type_by_id = {}
+
+        for element_type, elements in self._intentional_elements.items():
+            for element_id, element in elements.items():
+                if element_id in self._element_by_id:
+                    continue
+                self._element_by_id[element_id] = element
+                self._type_by_id[element_id] = element_type
+
+    def _index_links_by_node(self) -> None:
+        """Builds the per-kind and per-node adjacency lists of every stored link.
+
+        Each list keeps the storage order of the source dicts, so rules that switch to
+        these queries still visit links in the same order as before.
+        """
+        self._links_by_kind = {}
+        self._outgoing_links = {}
+        self._incoming_links = {}
+
+        for link in self._social_dependencies.values():
+            self._add_link_to_indexes(SOCIAL_DEPENDENCY, link)
+        for link in self._internal_links.values():
+            self._add_link_to_indexes(link.get("type"), link)
+        for link in self._refinements.values():
+            self._add_link_to_indexes(REFINEMENT, link)
+
+    def _add_link_to_indexes(self, kind: str, link) -> None:
+        """Adds one link to the kind list and to the adjacency of both endpoints."""
+        self._links_by_kind.setdefault(kind, []).append(link)
+
+        source_id = link.get("source")
+        if source_id:
+            outgoing = self._outgoing_links.setdefault(source_id, {})
+            outgoing.setdefault(kind, []).append(link)
+
+        target_id = link.get("target")
+        if target_id:
+            incoming = self._incoming_links.setdefault(target_id, {})
+            incoming.setdefault(kind, []).append(link)
 
     # ====== Public API ======
     # Methods below expose the parsed iStar structures to services and transformations.
@@ -107,6 +277,31 @@ class IstarModel:
 
         return self._element_to_actor
 
+    def get_element_by_id(self, element_id: str):
+        """Returns the stored intentional element for one id, whatever its type.
+
+        This lookup lets link-based rules resolve an endpoint in constant time when they
+        only know the id kept by the link.
+
+        For example, it can return the entry behind:
+            task: EncryptData
+        """
+
+        if not element_id:
+            return None
+        return self._element_by_id.get(element_id)
+
+    def get_element_type(self, element_id: str):
+        """Returns the iStar type of one stored intentional element id.
+
+        This lookup lets rules check what kind of node a link endpoint is without
+        probing each type group separately.
+        """
+
+        if not element_id:
+            return None
+        return self._type_by_id.get(element_id)
+
     def get_label_by_id(self, element_id: str) -> str:
         """Returns the stored label for one intentional element id.
 
@@ -117,12 +312,36 @@ class IstarModel:
             goal: ImproveSecurity
         """
 
-        if not element_id:
+        element = self.get_element_by_id(element_id)
+        if not element:
             return ""
+        return element.get("label") or ""
+
+    # ------------ Link Adjacency ------------
+    # Methods below return only the links a rule needs instead of every stored link.
+    def links_of_kind(self, kind: str) -> list:
+        """Returns every stored link of one kind in storage order.
+
+        This query lets a rule visit only the links it handles, such as the needed-by
+        links, instead of filtering all internal links by type.
+        """
 
-        for elements in self._intentional_elements.values():
-            element = elements.get(element_id)
-            if element:
-                return element.get("label") or ""
+        return self._links_by_kind.get(kind, [])
+
+    def links_from(self, element_id: str, kind: str) -> list:
+        """Returns the links of one kind whose source is the given element id.
+
+        For example, it can return the dependency that starts at a resource:
+            resource: RoutePlan --dependency-link--> task: DeliverOrder
+        """
+
+        return self._outgoing_links.get(element_id, {}).get(kind, [])
+
+    def links_to(self, element_id: str, kind: str) -> list:
+        """Returns the links of one kind whose target is the given element id.
+
+        For example, it can return the qualification that points to a goal:
+            softgoal: FastDelivery --qualification-link--> goal: PerformDelivery
+        """
 
-        return ""
+        return self._incoming_links.get(element_id, {}).get(kind, [])
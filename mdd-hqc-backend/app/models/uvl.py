@@ -1,10 +1,13 @@
 """UVL in-memory model and file writer used across parsing and transformation."""
 
+import bisect
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Literal, Optional, Set, TextIO, Tuple
 from pydantic import BaseModel, Field
 
+from app.core.storage import atomic_write_text, atomic_writer
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,6 +29,13 @@ CATEGORY_LABELS: Dict[str, str] = {
     "@Quantum_HW_constraint": "Quantum_HW_constraint",
 }
 
+# Blocks written under the Algorithm category: base features, then each subgroup.
+ALGORITHM_SUBGROUPS: Tuple[Optional[str], ...] = (None, "Classical", "Quantum")
+
+# ------------ Streaming ------------
+# Lines joined into one block by `UVL.iter_chunks` before it is handed to the sink.
+STREAM_CHUNK_LINES = 4096
+
 
 class Feature(BaseModel):
     """Represents one feature stored inside the in-memory UVL model.
@@ -49,6 +59,8 @@ class UVL:
 
     This class centralizes features, hierarchy relations, constraints, and comments so
     services and transformations can work on one consistent representation of the model.
+    Features are indexed by name, by name and category, by category, and by category and
+    subgroup, so lookups never scan `features`; add them through `add_feature` only.
     """
 
     FILE_NAME = Path("data/model.uvl")
@@ -67,122 +79,206 @@ class UVL:
         self.global_comments: List[str] = []
         self.parent_by_child: Dict[str, str] = {}
 
+        # Membership sets mirroring the lists above and the metadata and child lists of
+        # each feature, so dedupe checks are constant time. Feature sets are keyed by
+        # name, category, and list, and built from the list on first use.
+        self._constraint_set: Set[str] = set()
+        self._contribution_set: Set[str] = set()
+        self._global_comment_set: Set[str] = set()
+        self._feature_list_sets: Dict[Tuple[str, str, str], Set[str]] = {}
+
+        # Indexes over `features`; each list keeps the insertion order of `features`,
+        # and group entries carry the position of their feature in `features`.
+        self._feature_by_name: Dict[str, Feature] = {}
+        self._feature_by_key: Dict[Tuple[str, str], Feature] = {}
+        self._features_by_category: Dict[str, List[Feature]] = {}
+        self._features_by_group: Dict[
+            Tuple[str, Optional[str]], List[Tuple[int, Feature]]
+        ] = {}
+        self._child_names_by_parent: Dict[str, List[str]] = {}
+
     # ====== Private Helpers ======
     # Internal methods below resolve UVL structure before the public API writes or queries it.
 
     # ------------ UVL File Writing ------------
     # Methods below turn the in-memory UVL model into the exported `.uvl` file structure.
-    def create_file(self) -> None:
-        """Writes the current in-memory UVL model to the default output file.
+    def render(self) -> str:
+        """Returns the current in-memory UVL model as `.uvl` text.
 
-        This method is used when the backend needs a persisted UVL artifact after the
-        model has already been assembled in memory.
+        This method builds the exported text in memory, so callers can return it right
+        away and persist it later, or not at all, without reading a file back.
 
-        For example, after writing the file, the exported model can contain:
+        For example, the rendered model can contain:
             @Functionality {
                 EncryptData
             }
         """
-        self.FILE_NAME.parent.mkdir(parents=True, exist_ok=True)
+        return "".join(self.iter_chunks())
 
-        logger.info(
-            "Writing UVL file: path=%s, features=%s, constraints=%s",
-            self.FILE_NAME,
-            len(self.features),
-            len(self.constraints),
-        )
+    def iter_chunks(self, chunk_lines: int = STREAM_CHUNK_LINES) -> Iterator[str]:
+        """Yields the `.uvl` text of the current model in blocks of `chunk_lines` lines.
+
+        The feature tree is walked once and the lines are joined into one string per
+        block, so a consumer such as a streaming response or a gzip stream receives
+        large writes and never holds the whole text. A block closes after the root
+        feature that fills it, so one large subtree can make it longer. The model must
+        not change while the chunks are consumed.
+        """
+        lines = ["features\n"]
+
+        for label, blocks in self._build_write_tree():
+            lines.append(f"    {label}\n")
+            for subgroup, features in blocks:
+                indent = self._emit_block_header(lines, subgroup)
+                for feature in features:
+                    self._emit_feature(lines, feature, indent=indent)
+                    if len(lines) >= chunk_lines:
+                        yield "".join(lines)
+                        lines.clear()
+
+        if self.constraints:
+            lines.append("\nconstraints\n")
+            for constraint in self.constraints:
+                lines.append(f"    {constraint}\n")
+                if len(lines) >= chunk_lines:
+                    yield "".join(lines)
+                    lines.clear()
+
+        if lines:
+            yield "".join(lines)
+
+    def iter_section_lines(self, category: str) -> Iterator[str]:
+        """Yields the lines `iter_chunks` writes for one category section, in order.
+
+        Readers that only need one section of the `.uvl` text, such as the
+        Functionality block, get it from the model without rendering the rest. Nothing
+        is yielded when the category has no root features.
+        """
+        blocks = self._build_section_blocks(category)
+        if not blocks:
+            return
 
-        with self.FILE_NAME.open("w", encoding="utf-8") as file:
-            self._write_features(file)
-            self._write_constraints(file)
+        yield f"    {CATEGORY_LABELS[category]}\n"
+        for subgroup, features in blocks:
+            lines: List[str] = []
+            indent = self._emit_block_header(lines, subgroup)
+            for feature in features:
+                self._emit_feature(lines, feature, indent=indent)
+                yield from lines
+                lines.clear()
 
-    def _write_features(self, file) -> None:
-        """Writes the feature section of the current UVL model into one file handle.
+    def iter_section_labels(self) -> Iterator[str]:
+        """Yields the labels of the category sections `iter_chunks` writes, in order.
 
-        This helper is used by file creation so the visible feature hierarchy of the
-        model can be exported category by category in the expected UVL layout.
+        A section is written only when its category has root features, so readers can
+        list the sections of the `.uvl` text without building any of its lines.
         """
-        file.write("features\n")
-
         for category in EXTENDED_FEATURE_MODEL_HQC:
-            if category == "@Algorithm":
-                self._write_algorithm_category(file)
-                continue
+            if self._build_section_blocks(category):
+                yield CATEGORY_LABELS[category]
 
-            features = self._get_root_features(category=category)
-            if not features:
-                continue
+    def write_to(self, sink: TextIO) -> int:
+        """Writes the `.uvl` text of the model to `sink` and returns its length.
 
-            file.write(f"    {CATEGORY_LABELS[category]}\n")
-            self._write_group_block(file, features, indent=8, group_name="mandatory")
+        Any object with a text `write` method works, such as `io.StringIO`, an open
+        file, or `gzip.open(path, "wt")`. The text arrives in the blocks of
+        `iter_chunks`, so the sink sees a few large writes.
+        """
+        written = 0
+        for chunk in self.iter_chunks():
+            sink.write(chunk)
+            written += len(chunk)
+        return written
 
-    def _write_algorithm_category(self, file) -> None:
-        """Writes the algorithm category, including classical and quantum subgroups.
+    def create_file(
+        self, file_path: Optional[Path] = None, content: Optional[str] = None
+    ) -> Path:
+        """Writes the current in-memory UVL model to `file_path` and returns the path.
 
-        This helper is used so the exported model can keep the special algorithm layout
-        required when features are split across subgroup branches.
+        This method is used when the backend needs a persisted UVL artifact after the
+        model has already been assembled in memory. The file defaults to `FILE_NAME` and
+        is replaced atomically, so concurrent readers never see a partial model. Pass
+        the text returned by `render` as `content` to skip rendering it again; otherwise
+        the model is streamed to the file through `write_to`.
         """
-        base_features = self._get_root_features(category="@Algorithm")
-        classical_features = self._get_root_features(
-            category="@Algorithm",
-            subgroup="Classical",
-        )
-        quantum_features = self._get_root_features(
-            category="@Algorithm",
-            subgroup="Quantum",
+        output_path = file_path or self.FILE_NAME
+
+        logger.info(
+            "Writing UVL file: path=%s, features=%s, constraints=%s",
+            output_path,
+            len(self.features),
+            len(self.constraints),
         )
 
-        if not base_features and not classical_features and not quantum_features:
-            return
+        if content is not None:
+            atomic_write_text(output_path, content)
+            return output_path
 
-        file.write("    Algorithm\n")
+        with atomic_writer(output_path) as file:
+            self.write_to(file)
+        return output_path
 
-        if base_features:
-            self._write_group_block(
-                file,
-                base_features,
-                indent=8,
-                group_name="mandatory",
-            )
+    def _build_write_tree(
+        self,
+    ) -> List[Tuple[str, List[Tuple[Optional[str], List[Feature]]]]]:
+        """Returns the visible category sections and the root features of each block.
 
-        if classical_features:
-            file.write("        Classical\n")
-            self._write_group_block(
-                file,
-                classical_features,
-                indent=12,
-                group_name="mandatory",
-            )
+        Each section pairs the category label with its non-empty blocks. Algorithm keeps
+        its base block plus the `Classical` and `Quantum` subgroup blocks; every other
+        category has one block of root features without subgroup.
 
-        if quantum_features:
-            file.write("        Quantum\n")
-            self._write_group_block(
-                file,
-                quantum_features,
-                indent=12,
-                group_name="mandatory",
-            )
+        For example, a model with one quantum algorithm gives:
+            [("Algorithm", [("Quantum", [QuantumSearch])])]
+        """
+        tree: List[Tuple[str, List[Tuple[Optional[str], List[Feature]]]]] = []
 
-    def _write_group_block(
+        for category in EXTENDED_FEATURE_MODEL_HQC:
+            blocks = self._build_section_blocks(category)
+            if blocks:
+                tree.append((CATEGORY_LABELS[category], blocks))
+
+        return tree
+
+    def _build_section_blocks(
+        self, category: str
+    ) -> List[Tuple[Optional[str], List[Feature]]]:
+        """Returns the non-empty blocks of root features written under one category."""
+        subgroups = ALGORITHM_SUBGROUPS if category == "@Algorithm" else (None,)
+        return [
+            (subgroup, features)
+            for subgroup in subgroups
+            if (features := self._get_root_features(category, subgroup))
+        ]
+
+    def _emit_block_header(self, lines: List[str], subgroup: Optional[str]) -> int:
+        """Appends the subgroup and `mandatory` lines of one block and returns the
+        indentation of its root features."""
+        indent = 8
+        if subgroup is not None:
+            lines.append(f"        {subgroup}\n")
+            indent = 12
+        lines.append(f"{' ' * indent}mandatory\n")
+        return indent + 4
+
+    def _emit_group_block(
         self,
-        file,
+        lines: List[str],
         features: List[Feature],
         indent: int,
         group_name: str,
     ) -> None:
-        """Writes one grouped child block such as `mandatory` or `or` to the UVL file.
+        """Appends one grouped child block such as `mandatory` or `or` to `lines`.
 
         This helper supports the methods that export the visible model structure by
         preserving grouped child relationships in the generated hierarchy.
         """
-        indentation = " " * indent
-        file.write(f"{indentation}{group_name}\n")
+        lines.append(f"{' ' * indent}{group_name}\n")
 
         for feature in features:
-            self._write_feature(file, feature, indent=indent + 4)
+            self._emit_feature(lines, feature, indent=indent + 4)
 
-    def _write_feature(self, file, feature: Feature, indent: int) -> None:
-        """Writes one stored feature and its nested content to the UVL file.
+    def _emit_feature(self, lines: List[str], feature: Feature, indent: int) -> None:
+        """Appends one stored feature and its nested content to `lines`.
 
         This helper is responsible for exporting the visible shape of one feature,
         including metadata, attributes, and child groups, when the model is serialized.
@@ -190,51 +286,115 @@ class UVL:
         indentation = " " * indent
 
         for line in feature.metadata:
-            file.write(f"{indentation}# {line}\n")
+            lines.append(f"{indentation}# {line}\n")
 
-        file.write(f"{indentation}{feature.name}\n")
+        lines.append(f"{indentation}{feature.name}\n")
 
         if feature.kind or feature.attributes:
-            file.write(f"{indentation}{{\n")
+            lines.append(f"{indentation}{{\n")
 
             if feature.kind:
-                file.write(f'{indentation}    kind "{feature.kind}"\n')
+                lines.append(f'{indentation}    kind "{feature.kind}"\n')
 
             for attribute_name, attribute_value in feature.attributes.items():
-                file.write(f'{indentation}    {attribute_name} "{attribute_value}"\n')
+                lines.append(f'{indentation}    {attribute_name} "{attribute_value}"\n')
 
-            file.write(f"{indentation}}}\n")
+            lines.append(f"{indentation}}}\n")
 
         if feature.mandatory_children:
-            child_features = self._get_child_features(feature.mandatory_children)
-            self._write_group_block(
-                file,
-                child_features,
+            self._emit_group_block(
+                lines,
+                self._get_child_features(feature.mandatory_children),
                 indent=indent + 4,
                 group_name="mandatory",
             )
 
         if feature.or_children:
-            child_features = self._get_child_features(feature.or_children)
-            self._write_group_block(
-                file,
-                child_features,
+            self._emit_group_block(
+                lines,
+                self._get_child_features(feature.or_children),
                 indent=indent + 4,
                 group_name="or",
             )
 
-    def _write_constraints(self, file) -> None:
-        """Writes the constraint section of the UVL model when constraints exist.
+    # ------------ Feature Indexes ------------
+    # Methods below keep the feature indexes in step with `features`.
+    def _index_feature(self, feature: Feature) -> None:
+        """Adds one feature just appended to `features` to every index.
 
-        This helper is used during export so the final file preserves the cross-feature
-        rules already stored in memory.
+        The name index keeps the first feature of each name, matching what a scan over
+        `features` would return for a lookup without category.
         """
-        if not self.constraints:
-            return
+        self._feature_by_key[(feature.name, feature.category)] = feature
+        self._feature_by_name.setdefault(feature.name, feature)
+        self._features_by_category.setdefault(feature.category, []).append(feature)
+        self._features_by_group.setdefault(
+            (feature.category, feature.subgroup), []
+        ).append((len(self.features) - 1, feature))
+
+    def _move_to_subgroup(self, feature: Feature, subgroup: str) -> None:
+        """Sets the subgroup of one stored feature and moves it to its new group index.
+
+        The feature is inserted at its original position among the group members, so
+        group lists stay in `features` order even when the subgroup is assigned late.
+        """
+        old_group = self._features_by_group[(feature.category, feature.subgroup)]
+        index = next(i for i, (_, member) in enumerate(old_group) if member is feature)
+        entry = old_group.pop(index)
+        feature.subgroup = subgroup
+
+        new_group = self._features_by_group.setdefault((feature.category, subgroup), [])
+        bisect.insort(new_group, entry, key=lambda item: item[0])
+
+    def _feature_list_set(self, feature: Feature, list_name: str) -> Set[str]:
+        """Returns the membership set of one list field of a stored feature."""
+        key = (feature.name, feature.category, list_name)
+        members = self._feature_list_sets.get(key)
+        if members is None:
+            members = set(getattr(feature, list_name))
+            self._feature_list_sets[key] = members
+        return members
+
+    def _add_feature_metadata(self, feature: Feature, comment: str) -> None:
+        """Appends one metadata comment to a stored feature unless it already has it."""
+        members = self._feature_list_set(feature, "metadata")
+        if comment not in members:
+            members.add(comment)
+            feature.metadata.append(comment)
 
-        file.write("\nconstraints\n")
-        for constraint in self.constraints:
-            file.write(f"    {constraint}\n")
+    def _add_feature_child(
+        self,
+        parent_feature: Feature,
+        child_name: str,
+        group: Literal["mandatory_children", "or_children"],
+    ) -> None:
+        """Lists one child in `group` of a parent, moving it out of the other group.
+
+        Membership is checked on sets; the list is only scanned when the child really
+        moves between groups, which happens at most once per relinking call.
+        """
+        other_group = (
+            "or_children" if group == "mandatory_children" else "mandatory_children"
+        )
+        other_members = self._feature_list_set(parent_feature, other_group)
+        if child_name in other_members:
+            other_members.discard(child_name)
+            getattr(parent_feature, other_group).remove(child_name)
+
+        members = self._feature_list_set(parent_feature, group)
+        if child_name not in members:
+            members.add(child_name)
+            getattr(parent_feature, group).append(child_name)
+
+    def _link_child(self, parent_name: str, child_name: str) -> None:
+        """Records one parent-child relation in `parent_by_child` and its reverse index.
+
+        Callers only link a child whose parent is unset or already `parent_name`, so
+        the reverse index lists each child once, in the order it was first linked.
+        """
+        if child_name not in self.parent_by_child:
+            self._child_names_by_parent.setdefault(parent_name, []).append(child_name)
+        self.parent_by_child[child_name] = parent_name
 
     # ------------ Hierarchy Resolution ------------
     # Methods below reconstruct parent-child structure from the features stored in memory.
@@ -253,20 +413,11 @@ class UVL:
                 Security
             }
         """
-        result: List[Feature] = []
-
-        for feature in self.features:
-            if feature.category != category:
-                continue
-            if subgroup is not None and feature.subgroup != subgroup:
-                continue
-            if subgroup is None and feature.subgroup is not None:
-                continue
-            if feature.name in self.parent_by_child:
-                continue
-            result.append(feature)
-
-        return result
+        return [
+            feature
+            for _, feature in self._features_by_group.get((category, subgroup), [])
+            if feature.name not in self.parent_by_child
+        ]
 
     def _get_child_features(self, child_names: List[str]) -> List[Feature]:
         """Returns the child feature objects that match the provided feature names.
@@ -277,7 +428,8 @@ class UVL:
         result: List[Feature] = []
 
         for child_name in child_names:
-            child_feature = self.get_feature(child_name)
+            name = (child_name or "").strip()
+            child_feature = self._feature_by_name.get(name) if name else None
             if child_feature is None:
                 continue
             result.append(child_feature)
@@ -316,14 +468,13 @@ class UVL:
         if existing_feature is not None:
             if metadata:
                 for comment in metadata:
-                    if comment not in existing_feature.metadata:
-                        existing_feature.metadata.append(comment)
+                    self._add_feature_metadata(existing_feature, comment)
             if kind and not existing_feature.kind:
                 existing_feature.kind = kind
             if attributes:
                 existing_feature.attributes.update(attributes)
             if subgroup and not existing_feature.subgroup:
-                existing_feature.subgroup = subgroup
+                self._move_to_subgroup(existing_feature, subgroup)
             return existing_feature
 
         feature = Feature(
@@ -335,6 +486,7 @@ class UVL:
             subgroup=subgroup,
         )
         self.features.append(feature)
+        self._index_feature(feature)
         return feature
 
     def add_comment_to_feature(
@@ -354,8 +506,8 @@ class UVL:
         feature = self.get_feature(name=feature_name, category=category)
         if feature is None:
             return
-        if comment and comment not in feature.metadata:
-            feature.metadata.append(comment)
+        if comment:
+            self._add_feature_metadata(feature, comment)
 
     def add_global_comment(self, comment: str) -> None:
         """Adds one model-wide comment to the UVL draft when it is not duplicated.
@@ -366,8 +518,9 @@ class UVL:
         comment = comment.strip()
         if not comment:
             return
-        if comment in self.global_comments:
+        if comment in self._global_comment_set:
             return
+        self._global_comment_set.add(comment)
         self.global_comments.append(comment)
 
     def add_attribute_to_feature(
@@ -407,8 +560,9 @@ class UVL:
         expr = expr.strip()
         if not expr:
             return
-        if expr in self.constraints:
+        if expr in self._constraint_set:
             return
+        self._constraint_set.add(expr)
         self.constraints.append(expr)
 
     def add_contribution(self, comment: str) -> None:
@@ -420,8 +574,9 @@ class UVL:
         comment = comment.strip()
         if not comment:
             return
-        if comment in self.contributions:
+        if comment in self._contribution_set:
             return
+        self._contribution_set.add(comment)
         self.contributions.append(comment)
 
     def add_mandatory_child(self, parent_name: str, child_name: str) -> None:
@@ -449,11 +604,8 @@ class UVL:
         if previous_parent and previous_parent != parent_name:
             return
 
-        if child_name in parent_feature.or_children:
-            parent_feature.or_children.remove(child_name)
-        if child_name not in parent_feature.mandatory_children:
-            parent_feature.mandatory_children.append(child_name)
-        self.parent_by_child[child_name] = parent_name
+        self._add_feature_child(parent_feature, child_name, "mandatory_children")
+        self._link_child(parent_name, child_name)
 
     def add_or_child(self, parent_name: str, child_name: str) -> None:
         """Registers one `or` child relation between two stored features.
@@ -481,11 +633,8 @@ class UVL:
         if previous_parent and previous_parent != parent_name:
             return
 
-        if child_name in parent_feature.mandatory_children:
-            parent_feature.mandatory_children.remove(child_name)
-        if child_name not in parent_feature.or_children:
-            parent_feature.or_children.append(child_name)
-        self.parent_by_child[child_name] = parent_name
+        self._add_feature_child(parent_feature, child_name, "or_children")
+        self._link_child(parent_name, child_name)
 
     # ------------ Model Queries ------------
     # Methods below expose the stored feature sets, constraints, and comments to other layers.
@@ -508,11 +657,7 @@ class UVL:
                 QuantumSearch
             }
         """
-        result: List[Feature] = []
-        for feature in self.features:
-            if feature.category == category:
-                result.append(feature)
-        return result
+        return list(self._features_by_category.get(category, []))
 
     def get_feature(
         self, name: str, category: Optional[str] = None
@@ -535,17 +680,17 @@ class UVL:
         if not name:
             return None
 
-        for feature in self.features:
-            if feature.name != name:
-                continue
-            if (
-                normalized_category is not None
-                and feature.category != normalized_category
-            ):
-                continue
-            return feature
+        if normalized_category is None:
+            return self._feature_by_name.get(name)
+        return self._feature_by_key.get((name, normalized_category))
 
-        return None
+    def get_child_names(self, parent_name: str) -> List[str]:
+        """Returns the names of the features linked below one parent feature.
+
+        Mandatory and `or` children are both included, in the order they were first
+        linked, so callers never need to scan `parent_by_child` for one parent.
+        """
+        return list(self._child_names_by_parent.get(parent_name, []))
 
     def get_constraints(self) -> List[str]:
         """Returns the constraints currently stored in the UVL model.
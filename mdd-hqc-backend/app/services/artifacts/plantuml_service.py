@@ -2,6 +2,7 @@
 
 import logging
 from pathlib import Path
+from app.core.storage import atomic_write_text
 from app.models.uml import UmlClass, UmlDependency, UmlModel
 
 logger = logging.getLogger(__name__)
@@ -377,6 +378,9 @@ class PlantumlService:
     the generated UML model as a `.puml` artifact.
     """
 
+    # NOTE: Bump whenever `render` output changes, so cached PlantUML text is not reused.
+    RENDERER_VERSION = "1"
+
     def render(self, uml_model: UmlModel) -> str:
         """Returns the PlantUML text generated from one UML model.
 
@@ -391,9 +395,15 @@ class PlantumlService:
         This method is used by transformation endpoints when they need a persistent UML
         artifact that can be returned or inspected outside the process memory.
         """
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        content = self.render(uml_model)
-        output_path.write_text(content, encoding="utf-8")
+        return self.write_text(self.render(uml_model), output_path)
+
+    def write_text(self, content: str, output_path: Path) -> Path:
+        """Writes already rendered PlantUML text to disk and returns its path.
+
+        This method lets cached pipeline stages persist the exact text they rendered
+        earlier without rendering the UML model again.
+        """
+        atomic_write_text(output_path, content)
         logger.info(
             "PlantUML artifact written: path=%s, bytes=%s",
             output_path,
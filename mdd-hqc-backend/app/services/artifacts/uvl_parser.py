@@ -0,0 +1,420 @@
+"""Incremental parser that rebuilds the in-memory UVL model from `.uvl` text."""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.core.cache import LruCache
+from app.core.config import config
+from app.core.hashing import file_content_hash
+from app.models.uvl import CATEGORY_LABELS, UVL
+
+logger = logging.getLogger(__name__)
+
+# ------------ Grammar ------------
+# Keywords and labels of the `.uvl` layout written by `UVL.iter_chunks`.
+GROUP_KEYWORDS = ("mandatory", "or")
+CATEGORY_BY_LABEL: Dict[str, str] = {
+    label: category for category, label in CATEGORY_LABELS.items()
+}
+
+# Frame pushed for each open section, category, subgroup, group, or feature line:
+# (indent, kind, name, category, subgroup, parent feature name or feature record).
+Frame = Tuple[int, str, str, Optional[str], Optional[str], object]
+
+# Parser state at a block boundary: the open header frames and pending comments.
+ParserState = Tuple[Tuple[Frame, ...], Tuple[str, ...]]
+EMPTY_STATE: ParserState = ((), ())
+
+# Characters compared per step when locating the edited region of a new text.
+DIFF_CHUNK_CHARS = 65_536
+
+# ------------ Parsed Model Cache ------------
+# Process-wide cache of parsed UVL documents keyed by content hash.
+uvl_model_cache = LruCache(
+    name="uvl_models",
+    max_entries=config.UVL_CACHE_MAX_ENTRIES,
+    max_bytes=config.UVL_CACHE_MAX_BYTES,
+)
+
+# Content hash last parsed for each path, so an edited file reparses incrementally.
+uvl_path_cache = LruCache(
+    name="uvl_paths",
+    max_entries=config.UVL_CACHE_MAX_ENTRIES,
+    max_bytes=0,
+)
+
+
+@dataclass(slots=True)
+class ParsedFeature:
+    """Stores one feature line with the context, comments, and attributes around it."""
+
+    category: str
+    subgroup: Optional[str]
+    name: str
+    metadata: List[str]
+    parent: Optional[str] = None
+    group: Optional[str] = None
+    kind: Optional[str] = None
+    attributes: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class ParsedBlock:
+    """Stores what one block of lines declares, and the parser state it starts from.
+
+    A block starts at every line outside a feature subtree: a section, category,
+    subgroup, or group header, a root feature with its whole subtree, a comment before
+    it, or one constraint. Its records only depend on its state and its lines, so an
+    unchanged block that starts from the same state never needs parsing again.
+    """
+
+    start: int
+    state: ParserState
+    features: List[ParsedFeature] = field(default_factory=list)
+    constraints: List[str] = field(default_factory=list)
+    namespace: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ParsedUvl:
+    """Groups one `.uvl` text with the blocks parsed from it.
+
+    The record is kept as the base of the next parse of the same file, so only the
+    blocks around an edit are parsed again. Blocks are shared between versions and
+    must be treated as read-only. `written_by_model` is set by `load_uvl_model` when
+    the model built from the blocks writes back exactly `text`.
+    """
+
+    text: str
+    blocks: List[ParsedBlock]
+    reparsed_chars: int = 0
+    written_by_model: bool = False
+
+    def to_uvl(self) -> UVL:
+        """Builds a new `UVL` model from the parsed blocks in one pass.
+
+        Features are registered in text order through the regular `UVL` methods, so the
+        model merges and links them exactly as if the transformation had built it.
+
+        For example, the text:
+            Security
+            {
+                kind "goal"
+            }
+                mandatory
+                    EncryptData
+        gives `Security` with kind `goal` and `EncryptData` as its mandatory child.
+        """
+        uvl = UVL()
+        for block in self.blocks:
+            if block.namespace is not None:
+                uvl.namespace = block.namespace
+            for feature in block.features:
+                uvl.add_feature(
+                    category=feature.category,
+                    metadata=list(feature.metadata),
+                    name=feature.name,
+                    kind=feature.kind,
+                    attributes=dict(feature.attributes),
+                    subgroup=feature.subgroup,
+                )
+                if feature.group == "mandatory":
+                    uvl.add_mandatory_child(feature.parent, feature.name)
+                elif feature.group == "or":
+                    uvl.add_or_child(feature.parent, feature.name)
+            for constraint in block.constraints:
+                uvl.add_constraint(constraint)
+        return uvl
+
+
+# ====== Private Helpers ======
+# Internal functions below tokenize lines, parse blocks, locate edited regions, and
+# check that a parsed model writes its text back.
+
+
+# ------------ Tokenizing ------------
+# Functions below stream over the text and parse the lines of consecutive blocks.
+def _parse_attribute(feature: ParsedFeature, body: str) -> None:
+    """Stores one `name "value"` line of an attribute block on its feature."""
+    name, _, value = body.partition(" ")
+    value = value.strip()
+    if not value:
+        return
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        value = value[1:-1]
+    if name == "kind":
+        feature.kind = value
+    else:
+        feature.attributes[name] = value
+
+
+def _parse_blocks(
+    text: str,
+    start: int,
+    state: ParserState,
+    resume: Optional[Dict[int, Tuple[int, ParserState]]] = None,
+) -> Tuple[List[ParsedBlock], Optional[int], int]:
+    """Parses the blocks of `text` from offset `start`, which opens in `state`.
+
+    Parsing is one linear pass that finds each line in place, without splitting the
+    text, and keeps a stack of open frames. When `resume` maps the offset of a new
+    block to an old block starting there with the same state, parsing stops, since
+    every later block is unchanged. Returns the blocks, the index of the old block to
+    resume from or None, and the offset where parsing stopped.
+    """
+    frames: List[Frame] = list(state[0])
+    pending: List[str] = list(state[1])
+    blocks: List[ParsedBlock] = []
+    block: Optional[ParsedBlock] = None
+    current: Optional[ParsedFeature] = None
+    in_attributes = False
+
+    size = len(text)
+    position = start
+    while position < size:
+        newline = text.find("\n", position)
+        offset, position = position, size if newline < 0 else newline + 1
+        content = text[offset:position].rstrip()
+        body = content.lstrip()
+        if not body:
+            continue
+
+        if in_attributes:
+            if body == "}":
+                in_attributes = False
+            elif current is not None:
+                _parse_attribute(current, body)
+            continue
+        if body == "{":
+            in_attributes = True
+            continue
+        if body == "}":
+            continue
+
+        indent = len(content) - len(body)
+        while frames and frames[-1][0] >= indent:
+            frames.pop()
+
+        top = frames[-1] if frames else None
+        if top is None or top[1] not in ("feature", "group") or top[5] is None:
+            block_state = (tuple(frames), tuple(pending))
+            if resume is not None and offset > start:
+                match = resume.get(offset)
+                if match is not None and match[1] == block_state:
+                    return blocks, match[0], offset
+            block = ParsedBlock(start=offset, state=block_state)
+            blocks.append(block)
+            current = None
+
+        if body[0] == "#":
+            pending.append(body[2:] if body.startswith("# ") else body[1:])
+            continue
+
+        if top is None:
+            if body == "features" or body == "constraints":
+                frames.append((indent, "section", body, None, None, None))
+            elif body.startswith("namespace "):
+                block.namespace = body.split(None, 1)[1]
+            continue
+
+        kind = top[1]
+        if kind == "section":
+            if top[2] == "constraints":
+                block.constraints.append(body)
+            else:
+                category = CATEGORY_BY_LABEL.get(body, f"@{body}")
+                frames.append((indent, "category", body, category, None, None))
+        elif kind == "category" or kind == "subgroup":
+            if body in GROUP_KEYWORDS:
+                frames.append((indent, "group", body, top[3], top[4], None))
+            elif kind == "category":
+                frames.append((indent, "subgroup", body, top[3], body, None))
+        elif kind == "group":
+            name = body
+            if name.endswith("{"):
+                name = name[:-1].rstrip()
+                in_attributes = True
+            current = ParsedFeature(
+                category=top[3],
+                subgroup=top[4],
+                name=name,
+                metadata=pending,
+                parent=top[5],
+                group=top[2] if top[5] is not None else None,
+            )
+            pending = []
+            block.features.append(current)
+            frames.append((indent, "feature", name, top[3], top[4], current))
+        elif body in GROUP_KEYWORDS:
+            frames.append((indent, "group", body, top[3], top[4], top[2]))
+
+    return blocks, None, len(text)
+
+
+# ------------ Edit Detection ------------
+# Functions below find the edited region of a new text with C-speed slice compares.
+def _common_prefix(old: str, new: str) -> int:
+    """Returns the length of the longest common prefix of two texts."""
+    limit = min(len(old), len(new))
+    low = 0
+    while low < limit:
+        high = min(low + DIFF_CHUNK_CHARS, limit)
+        if old[low:high] == new[low:high]:
+            low = high
+            continue
+        while high - low > 1:
+            middle = (low + high) // 2
+            if old[low:middle] == new[low:middle]:
+                low = middle
+            else:
+                high = middle
+        return low
+    return limit
+
+
+def _common_suffix(old: str, new: str, limit: int) -> int:
+    """Returns the length of the longest common suffix of two texts, up to `limit`."""
+    old_end, new_end = len(old), len(new)
+    matched = 0
+    while matched < limit:
+        step = min(DIFF_CHUNK_CHARS, limit - matched)
+        if (
+            old[old_end - matched - step : old_end - matched]
+            == new[new_end - matched - step : new_end - matched]
+        ):
+            matched += step
+            continue
+        low, high = 0, step
+        while high - low > 1:
+            middle = (low + high) // 2
+            if (
+                old[old_end - matched - middle : old_end - matched]
+                == new[new_end - matched - middle : new_end - matched]
+            ):
+                low = middle
+            else:
+                high = middle
+        return matched + low
+    return matched
+
+
+def _reparse(text: str, previous: ParsedUvl) -> ParsedUvl:
+    """Parses a new version of a text again, reusing the blocks around the edit.
+
+    Blocks before the edit are kept; parsing restarts one block earlier, since an edit
+    at the start of a line can make it part of the block before. Blocks after the
+    edit are reused from the first one whose offset and starting state both line up
+    again with the new parse.
+    """
+    old_text, old_blocks = previous.text, previous.blocks
+    prefix = _common_prefix(old_text, text)
+    suffix = _common_suffix(old_text, text, min(len(old_text), len(text)) - prefix)
+
+    first = 0
+    while first + 1 < len(old_blocks) and old_blocks[first + 1].start <= prefix:
+        first += 1
+    first = max(first - 1, 0)
+    if old_blocks and old_blocks[first].start <= prefix:
+        start, state = old_blocks[first].start, old_blocks[first].state
+    else:
+        first, start, state = 0, 0, EMPTY_STATE
+
+    shift = len(text) - len(old_text)
+    suffix_start = len(old_text) - suffix
+    resume = {
+        block.start + shift: (index, block.state)
+        for index, block in enumerate(old_blocks)
+        if block.start >= suffix_start and block.start > start
+    }
+
+    blocks, resume_index, stop = _parse_blocks(text, start, state, resume)
+    reused_tail: List[ParsedBlock] = []
+    if resume_index is not None:
+        for block in old_blocks[resume_index:]:
+            if shift:
+                block = ParsedBlock(
+                    start=block.start + shift,
+                    state=block.state,
+                    features=block.features,
+                    constraints=block.constraints,
+                    namespace=block.namespace,
+                )
+            reused_tail.append(block)
+
+    return ParsedUvl(
+        text=text,
+        blocks=old_blocks[:first] + blocks + reused_tail,
+        reparsed_chars=stop - start,
+    )
+
+
+# ------------ Round Trip ------------
+# Function below compares the text a model writes with the text it was parsed from.
+def _writes_text(uvl: UVL, text: str) -> bool:
+    """Tells whether `uvl` writes exactly `text`, comparing one chunk at a time."""
+    position = 0
+    try:
+        for chunk in uvl.iter_chunks():
+            end = position + len(chunk)
+            if text[position:end] != chunk:
+                return False
+            position = end
+    except RecursionError:
+        return False
+    return position == len(text)
+
+
+# ====== Public API ======
+# Functions below parse UVL text and load parsed UVL models of files.
+
+
+def parse_uvl(text: str, previous: Optional[ParsedUvl] = None) -> ParsedUvl:
+    """Parses `.uvl` text into blocks that rebuild the full `UVL` model.
+
+    Every feature keeps its category, subgroup, comments, kind, attributes, and group
+    under its parent, and every constraint is kept, so `parse_uvl(uvl.render())`
+    renders the same text again. With `previous`, the parse of an earlier version of
+    the same text, only the blocks around the edit are parsed again.
+    """
+    if previous is None:
+        blocks, _, _ = _parse_blocks(text, 0, EMPTY_STATE)
+        return ParsedUvl(text=text, blocks=blocks, reparsed_chars=len(text))
+    return _reparse(text, previous)
+
+
+def load_uvl_model(file_path: str) -> Tuple[ParsedUvl, UVL]:
+    """Returns the parsed text and `UVL` model of one `.uvl` file, reusing the cache.
+
+    The cache is keyed by content hash, so unchanged files, and copies with the same
+    content, skip reading and parsing. When the file changed since its last parse, the
+    old parse is the base of an incremental one. Both records are shared, so callers
+    must treat them as read-only.
+    """
+    content_hash = file_content_hash(file_path)
+    cached = uvl_model_cache.get(content_hash)
+    if cached is not None:
+        logger.debug("UVL model cache hit: path=%s", file_path)
+        return cached
+
+    path = Path(file_path)
+    resolved_path = str(path.resolve())
+    previous_hash = uvl_path_cache.get(resolved_path)
+    previous = uvl_model_cache.get(previous_hash) if previous_hash else None
+
+    text = path.read_text(encoding="utf-8")
+    parsed = parse_uvl(text, previous[0] if previous is not None else None)
+    uvl = parsed.to_uvl()
+    parsed.written_by_model = _writes_text(uvl, text)
+    logger.debug(
+        "UVL model parsed: path=%s, features=%s, reparsed_chars=%s, total_chars=%s",
+        file_path,
+        len(uvl.features),
+        parsed.reparsed_chars,
+        len(text),
+    )
+
+    uvl_model_cache.put(content_hash, (parsed, uvl), size=len(text))
+    uvl_path_cache.put(resolved_path, content_hash)
+    return parsed, uvl
@@ -2,10 +2,13 @@
 
 import csv
 import logging
-import re
-import unicodedata
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.labels import label_normalizer
+from app.models.uvl import CATEGORY_LABELS, UVL
+from app.services.artifacts.uvl_parser import ParsedUvl
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +23,10 @@ FEATURE_MODEL_HQC = (
     "@Quantum_HW_constraint",
     "@Functionality",
 )
+# Labels of the top-level HQC feature groups, as written in `.uvl` files.
+HQC_LABELS = frozenset(CATEGORY_LABELS.values())
+# Section and subgroup labels, which the text scans never read as feature names.
+RESERVED_NAMES = HQC_LABELS | {"Classical", "Quantum"}
 
 
 class UvlService:
@@ -29,13 +36,20 @@ class UvlService:
     turning free-form labels and UVL text into backend-friendly structures.
     """
 
+    # Keyword catalog read once per process and shared, read-only, by every instance.
+    _shared_category_keywords: Optional[Dict[str, List[str]]] = None
+
     def __init__(self):
-        """Initializes the service and loads the keyword catalog used for classification.
+        """Initializes the service with the keyword catalog used for classification.
 
-        This setup prepares the lookup tables required by naming and category detection
-        before other backend steps start processing source labels.
+        The catalog is read from the CSV file by the first instance of the process and
+        reused afterwards, so services created per request or per batch file stay warm.
         """
-        self.category_keywords: Dict[str, List[str]] = self._load_category_keywords()
+        if UvlService._shared_category_keywords is None:
+            UvlService._shared_category_keywords = self._load_category_keywords()
+        self.category_keywords: Dict[str, List[str]] = (
+            UvlService._shared_category_keywords
+        )
 
     # ------------ CATEGORY KEYWORD LOADING ------------
     # Helpers to load category keywords from the CSV file.
@@ -72,11 +86,7 @@ class UvlService:
         This helper keeps classification and formatting stable even when source labels
         contain punctuation or accented characters.
         """
-        normalized = unicodedata.normalize("NFKD", text)
-        ascii_text = normalized.encode("ascii", "ignore").decode("ascii")
-        cleaned = re.sub(r"[^A-Za-z0-9\s]", " ", ascii_text)
-        cleaned = re.sub(r"\s+", " ", cleaned)
-        return cleaned.strip()
+        return label_normalizer.normalize_text(text)
 
     def _split_words(self, label: str) -> List[str]:
         """Splits a normalized label into words used by the naming formatters.
@@ -106,6 +116,87 @@ class UvlService:
                     return category
         return None
 
+    # ------------ UVL LINE SCANNING ------------
+    # Helpers to read the interaction views from UVL lines or from a parsed model.
+
+    def _needs_text_scan(self, parsed: ParsedUvl, uvl: UVL) -> bool:
+        """Tells whether the views must come from the text instead of the model.
+
+        The model answers like the text scans only when it writes the parsed text back
+        unchanged and no feature is named like a section or subgroup label, which the
+        scans read as headers wherever they appear.
+        """
+        return not parsed.written_by_model or any(
+            uvl.get_feature(name) is not None for name in RESERVED_NAMES
+        )
+
+    def _scan_functionality_names(self, lines: Iterable[str]) -> List[str]:
+        """Collects the direct functionality names declared in the given UVL lines."""
+        names: List[str] = []
+        seen: Set[str] = set()
+        in_functionality = False
+        in_mandatory_group = False
+        functionality_indent = 0
+        mandatory_indent = 0
+
+        for raw_line in lines:
+            stripped = raw_line.strip()
+            indent = len(raw_line) - len(raw_line.lstrip(" "))
+
+            if not stripped:
+                continue
+
+            if stripped == "Functionality":
+                in_functionality = True
+                in_mandatory_group = False
+                functionality_indent = indent
+                continue
+
+            if in_functionality and indent <= functionality_indent:
+                in_functionality = False
+                in_mandatory_group = False
+
+            if not in_functionality:
+                continue
+
+            if stripped == "mandatory":
+                in_mandatory_group = True
+                mandatory_indent = indent
+                continue
+
+            if in_mandatory_group and indent <= mandatory_indent:
+                in_mandatory_group = False
+
+            if not in_mandatory_group:
+                continue
+
+            if stripped in {"mandatory", "or"}:
+                continue
+
+            if stripped.startswith("#"):
+                continue
+
+            if stripped in RESERVED_NAMES:
+                continue
+
+            feature_name = stripped
+            if feature_name == "{" or feature_name == "}":
+                continue
+            if feature_name.endswith("{"):
+                feature_name = feature_name[:-1].strip()
+            if feature_name.endswith("}"):
+                feature_name = feature_name[:-1].strip()
+            if not feature_name:
+                continue
+            if ' "' in feature_name:
+                continue
+
+            if feature_name not in seen:
+                seen.add(feature_name)
+                names.append(feature_name)
+
+        return names
+
     # ====== Public API ======
     # Methods below expose the naming, classification, and parsing helpers used by other layers.
 
@@ -213,13 +304,7 @@ class UvlService:
                     namespace = parts[1]
                 continue
 
-            if line in {
-                "Functionality",
-                "Algorithm",
-                "Programming",
-                "Integration_model",
-                "Quantum_HW_constraint",
-            }:
+            if line in HQC_LABELS:
                 features.append({"name": line, "category": "HQCSPL"})
 
         return {
@@ -229,6 +314,31 @@ class UvlService:
             "or_groups": {},
         }
 
+    def uvl_model_to_dict(self, parsed: ParsedUvl, uvl: UVL) -> dict:
+        """Builds the dictionary of `parse_uvl_to_dict` from an already parsed UVL file.
+
+        The interaction endpoints take the parse from the UVL cache, so the feature
+        groups are read from the sections the model writes instead of scanning the text.
+        The writer never declares a namespace, so it stays `default`. Files the model
+        does not write back unchanged are scanned as text instead.
+        """
+        if self._needs_text_scan(parsed, uvl):
+            return self.parse_uvl_to_dict(parsed.text)
+
+        features = [
+            {"name": name, "category": "HQCSPL"}
+            for name in chain(
+                uvl.iter_section_labels(), map(str.strip, uvl.constraints)
+            )
+            if name in HQC_LABELS
+        ]
+        return {
+            "namespace": "default",
+            "features": features,
+            "constraints": [],
+            "or_groups": {},
+        }
+
     # ------------ FUNCTIONALITY EXTRACTION ------------
     # Helpers to extract direct functionality names from the UVL model.
 
@@ -238,74 +348,17 @@ class UvlService:
         This method is used by interaction endpoints when they need a simple list of the
         main functionality names already declared in the UVL model.
         """
-        lines = uvl_text.splitlines()
-        names: List[str] = []
-        in_functionality = False
-        in_mandatory_group = False
-        functionality_indent = 0
-        mandatory_indent = 0
-
-        for raw_line in lines:
-            stripped = raw_line.strip()
-            indent = len(raw_line) - len(raw_line.lstrip(" "))
-
-            if not stripped:
-                continue
-
-            if stripped == "Functionality":
-                in_functionality = True
-                in_mandatory_group = False
-                functionality_indent = indent
-                continue
-
-            if in_functionality and indent <= functionality_indent:
-                in_functionality = False
-                in_mandatory_group = False
-
-            if not in_functionality:
-                continue
-
-            if stripped == "mandatory":
-                in_mandatory_group = True
-                mandatory_indent = indent
-                continue
-
-            if in_mandatory_group and indent <= mandatory_indent:
-                in_mandatory_group = False
-
-            if not in_mandatory_group:
-                continue
-
-            if stripped in {"mandatory", "or"}:
-                continue
-
-            if stripped.startswith("#"):
-                continue
-
-            if stripped in {
-                "Functionality",
-                "Algorithm",
-                "Programming",
-                "Integration_model",
-                "Quantum_HW_constraint",
-                "Classical",
-                "Quantum",
-            }:
-                continue
+        return self._scan_functionality_names(uvl_text.splitlines())
 
-            feature_name = stripped
-            if feature_name == "{" or feature_name == "}":
-                continue
-            if feature_name.endswith("{"):
-                feature_name = feature_name[:-1].strip()
-            if feature_name.endswith("}"):
-                feature_name = feature_name[:-1].strip()
-            if not feature_name:
-                continue
-            if ' "' in feature_name:
-                continue
-
-            if feature_name not in names:
-                names.append(feature_name)
+    def functionality_names(self, parsed: ParsedUvl, uvl: UVL) -> List[str]:
+        """Returns the names `extract_functionality_names` finds, from a parsed UVL file.
 
-        return names
+        Only the lines the model writes for its Functionality section are scanned, so a
+        cached parse answers without reading the file or walking the other sections.
+        Files the model does not write back unchanged are scanned as text instead.
+        """
+        if self._needs_text_scan(parsed, uvl):
+            return self.extract_functionality_names(parsed.text)
+        return self._scan_functionality_names(
+            line.rstrip("\n") for line in uvl.iter_section_lines("@Functionality")
+        )
@@ -1,12 +1,137 @@
 """Services that parse draw.io iStar XML files into in-memory model indexes."""
 
+import binascii
+import codecs
+import io
 import logging
+import mmap
+import os
+import pickle
+import re
 import xml.etree.ElementTree as ET
-
-from app.models.istar import IstarModel
+import zlib
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import unquote_to_bytes
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.core.cache import LruCache
+from app.core.config import config
+from app.core.executors import get_shared_process_pool
+from app.core.hashing import file_content_hash
+from app.core.storage import atomic_writer
+from app.models.istar import (
+    IntentionalElement,
+    InternalLink,
+    IstarModel,
+    Refinement,
+    SocialDependency,
+)
 
 logger = logging.getLogger(__name__)
 
+# ------------ Parsed Model Cache ------------
+# Process-wide cache of parsed iStar models keyed by file path, mtime, and size.
+istar_model_cache = LruCache(
+    name="istar_models",
+    max_entries=config.ISTAR_CACHE_MAX_ENTRIES,
+    max_bytes=config.ISTAR_CACHE_MAX_BYTES,
+)
+
+# ------------ Persisted Indexes ------------
+# Directory that holds the pickled indexes of pre-indexed uploads, keyed by content hash.
+ISTAR_INDEX_DIR = Path(config.ISTAR_INDEX_DIR)
+
+# NOTE: bump when `IstarModel` indexes change shape, so stale pickles are ignored.
+ISTAR_INDEX_FORMAT = 1
+
+# ------------ Diagram Layout ------------
+# Tag path of the draw.io objects indexed by the loaders; `None` matches any root tag.
+DIAGRAM_OBJECT_PATH: Tuple[Optional[str], ...] = (
+    None,
+    "diagram",
+    "mxGraphModel",
+    "root",
+    "object",
+)
+
+# Tag path of the objects inside one `<diagram>` page parsed on its own.
+PAGE_OBJECT_PATH: Tuple[Optional[str], ...] = DIAGRAM_OBJECT_PATH[1:]
+
+# Tag path of the objects inside an inflated `<diagram>` payload.
+INFLATED_OBJECT_PATH: Tuple[Optional[str], ...] = ("mxGraphModel", "root", "object")
+
+# Number of payload characters decoded per step when inflating compressed diagrams.
+COMPRESSED_CHUNK_CHARS = 65_536
+
+# Prolog a file needs for its pages to be split: an optional UTF-8 byte order mark
+# and XML declaration, whitespace, and the root start tag.
+XML_PROLOG_PATTERN = re.compile(
+    rb"(?:\xef\xbb\xbf)?(?:<\?xml(?P<declaration>\s[^?]*)\?>)?\s*<(?P<root>[A-Za-z_][\w.:-]*)"
+)
+XML_ENCODING_PATTERN = re.compile(rb"encoding\s*=\s*[\"']([^\"']*)[\"']")
+
+# Bytes that may follow a tag name, so `<diagram` never matches a longer name.
+TAG_NAME_DELIMITERS = frozenset({b" ", b"\t", b"\r", b"\n", b">", b"/"})
+
+# Root tags of draw.io exports: a full file or one bare graph model.
+DRAWIO_ROOT_TAGS: Tuple[str, ...] = ("mxfile", "mxGraphModel")
+
+
+class PersistedIstarIndex(BaseModel):
+    """Stores the parsed model of one XML file together with its CIM metrics.
+
+    Pre-indexed uploads write this record next to their content hash, so the first
+    transformation of the file in any process loads it instead of parsing the XML.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model: IstarModel
+    cim_metrics: Dict[str, Any]
+
+
+class ActorOwnershipInputs(BaseModel):
+    """Stores the raw lookups collected while reading diagram objects.
+
+    Both loaders fill this record in the same pass that indexes the iStar elements, so
+    ownership can be resolved afterwards without walking the XML a second time.
+    """
+
+    parent_by_id: Dict[str, Optional[str]] = Field(default_factory=dict)
+    type_by_id: Dict[str, Optional[str]] = Field(default_factory=dict)
+    label_by_id: Dict[str, Optional[str]] = Field(default_factory=dict)
+    owns_links: List[Tuple[str, str]] = Field(default_factory=list)
+    candidate_ids: List[str] = Field(default_factory=list)
+
+    def merge(self, other: "ActorOwnershipInputs") -> None:
+        """Appends the lookups of a later page, letting its entries win on shared ids."""
+        self.parent_by_id.update(other.parent_by_id)
+        self.type_by_id.update(other.type_by_id)
+        self.label_by_id.update(other.label_by_id)
+        self.owns_links.extend(other.owns_links)
+        self.candidate_ids.extend(other.candidate_ids)
+
+
+class DiagramPageIndexes(BaseModel):
+    """Stores the indexes built from one `<diagram>` page by a parallel worker.
+
+    Pages are indexed independently and merged in document order, so the result matches
+    a sequential load of the whole file.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    intentional_elements: Dict[str, Dict[str, IntentionalElement]] = Field(
+        default_factory=dict
+    )
+    social_dependencies: Dict[str, SocialDependency] = Field(default_factory=dict)
+    internal_links: Dict[str, InternalLink] = Field(default_factory=dict)
+    refinements: Dict[str, Refinement] = Field(default_factory=dict)
+    ownership: ActorOwnershipInputs = Field(default_factory=ActorOwnershipInputs)
+
 
 class XmlService(IstarModel):
     """Parses a draw.io iStar XML export and fills the in-memory iStar indexes.
@@ -15,20 +140,43 @@ class XmlService(IstarModel):
     the XML artifact into the indexed structures used by metrics and transformations.
     """
 
-    def __init__(self, file_path: str):
+    def __init__(
+        self,
+        file_path: str,
+        streaming: bool = False,
+        parallel: bool = False,
+        max_workers: Optional[int] = None,
+    ):
         """Initializes the parser and builds the iStar indexes from one XML file.
 
         This method is used at the start of CIM-related flows so the rest of the backend
-        can work with the parsed iStar model instead of raw XML.
+        can work with the parsed iStar model instead of raw XML. When `streaming` is set,
+        the file is read with `iterparse` so peak memory stays flat for large exports.
+        When `parallel` is set, each `<diagram>` page is indexed on its own process and
+        the pages are merged afterwards; single-page files use the sequential loaders.
         """
         super().__init__()
         self.file_path = file_path
+        self.streaming = streaming
+        self.parallel = parallel
+        self.max_workers = max_workers
 
-        logger.debug("Parsing iStar XML: path=%s", file_path)
-        self._build_indexes()
+        logger.debug(
+            "Parsing iStar XML: path=%s, streaming=%s, parallel=%s",
+            file_path,
+            streaming,
+            parallel,
+        )
+        is_built = parallel and self._build_indexes_parallel()
+        if not is_built and streaming:
+            self._build_indexes_streaming()
+        elif not is_built:
+            self._build_indexes()
         logger.info(
-            "XML indexes built: path=%s, intentional_types=%s, social_deps=%s, internal_links=%s, refinements=%s",
+            "XML indexes built: path=%s, streaming=%s, parallel=%s, intentional_types=%s, social_deps=%s, internal_links=%s, refinements=%s",
             file_path,
+            streaming,
+            parallel,
             len(self._intentional_elements),
             len(self._social_dependencies),
             len(self._internal_links),
@@ -63,29 +211,378 @@ class XmlService(IstarModel):
             )
             raise
 
-    def _get_raw_diagram_elements(self, root):
-        """Extracts the raw diagram elements that can later be indexed.
+    def _iter_streamed_objects(self) -> Iterator[ET.Element]:
+        """Yields the diagram objects of `self.file_path` while the file is streamed.
+
+        This helper reads the XML incrementally with `iterparse`, so the streaming loader
+        never holds more than the object currently being indexed.
+        """
+        try:
+            events = ET.iterparse(self.file_path, events=("start", "end"))
+            yield from self._iter_objects_from_events(events, DIAGRAM_OBJECT_PATH)
+        except ET.ParseError as exc:
+            logger.error(
+                "XML parse error: path=%s, error=%s", self.file_path, exc, exc_info=True
+            )
+            raise
+        except OSError as exc:
+            logger.error(
+                "Failed to read XML file: path=%s, error=%s",
+                self.file_path,
+                exc,
+                exc_info=True,
+            )
+            raise
+
+    def _iter_objects_from_events(
+        self,
+        events: Iterable[Tuple[str, ET.Element]],
+        object_path: Tuple[Optional[str], ...],
+    ) -> Iterator[ET.Element]:
+        """Yields every complete object found at `object_path` in a parse event stream.
+
+        This helper detaches each finished element at object level or above from its
+        parent, so the partially built tree never grows with the size of the file.
+        Compressed `<diagram>` payloads on the path are inflated and streamed in place.
+        """
+        tags: List[str] = []
+        elements: List[ET.Element] = []
+        object_depth = len(object_path)
+        diagram_depth = 0
+        if "diagram" in object_path:
+            diagram_depth = object_path.index("diagram") + 1
+
+        for event, element in events:
+            if event == "start":
+                tags.append(element.tag)
+                elements.append(element)
+                continue
+
+            if len(tags) == object_depth and self._matches_path(tags, object_path):
+                yield element
+            elif len(tags) == diagram_depth and self._matches_path(
+                tags, object_path[:diagram_depth]
+            ):
+                yield from self._iter_compressed_diagram_objects(element)
+
+            tags.pop()
+            elements.pop()
+            if elements and len(tags) < object_depth:
+                elements[-1].remove(element)
+
+    def _matches_path(
+        self, tags: List[str], object_path: Tuple[Optional[str], ...]
+    ) -> bool:
+        """Returns `True` when the open tag stack matches the expected object path.
+
+        This helper lets the streaming loader mirror the `findall` path used by the DOM
+        loader, where `None` stands for any document root tag.
+        """
+        for tag, expected in zip(tags, object_path, strict=True):
+            if expected is not None and tag != expected:
+                return False
+        return True
+
+    def _iter_tree_objects(self, root: ET.Element) -> Iterator[ET.Element]:
+        """Yields the diagram objects of a fully parsed tree, page by page.
+
+        This helper gives the DOM loader the same objects as the streaming loader,
+        including the ones stored in compressed `<diagram>` payloads.
+        """
+        for diagram in root.iterfind("./diagram"):
+            yield from self._iter_compressed_diagram_objects(diagram)
+            yield from diagram.iterfind("./mxGraphModel/root/object")
+
+    # ------------ Diagram Pages ------------
+    # Methods below split a multi-page file into byte ranges that parse on their own.
+    def _find_diagram_pages(self) -> List[Tuple[int, int]]:
+        """Returns the `(start, end)` byte range of every non-empty `<diagram>` page.
+
+        The file is scanned through a memory map, so locating the pages never parses or
+        copies the XML. Pages are parsed without the prolog, so no page is returned
+        unless the prolog declares UTF-8 or no encoding, and every page is a child of
+        the root. Files with comments, CDATA sections, processing instructions, or a
+        document type may hide `<diagram` text that is not a tag, and return no pages
+        either, so the caller falls back to a sequential loader. Self-closing pages
+        have no objects and are skipped.
+        """
+        with open(self.file_path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                pages = self._split_diagram_pages(content)
+
+        if pages is None:
+            logger.debug("Page split skipped: path=%s", self.file_path)
+            return []
+        return pages
+
+    def _split_diagram_pages(
+        self, content: mmap.mmap
+    ) -> Optional[List[Tuple[int, int]]]:
+        """Returns the page ranges of the mapped file, or None when it cannot be split.
+
+        The root must hold only whitespace around its `<diagram>` children, which is
+        what proves each match sits at depth 1 and no other content is skipped.
+        """
+        prolog = XML_PROLOG_PATTERN.match(content)
+        if prolog is None or content.find(b"<!") != -1:
+            return None
+        if content.find(b"<?", prolog.end()) != -1:
+            return None
+        encoding = XML_ENCODING_PATTERN.search(prolog.group("declaration") or b"")
+        if encoding is not None and encoding.group(1).lower() != b"utf-8":
+            return None
+
+        root_end = content.find(b">", prolog.end())
+        if root_end == -1 or content[root_end - 1 : root_end] == b"/":
+            return None
+
+        pages: List[Tuple[int, int]] = []
+        position = root_end + 1
+        starts = self._find_tags(content, b"<diagram", position, len(content))
+        limits = starts[1:] + [len(content)]
+        for start, limit in zip(starts, limits, strict=True):
+            if content[position:start].strip():
+                return None
+            closes = self._find_tags(content, b"</diagram", start, limit)
+            close_at = closes[0] if closes else -1
+            if close_at == -1:
+                tag_end = content.find(b">", start, limit)
+                if tag_end == -1 or content[tag_end - 1 : tag_end] != b"/":
+                    return None
+                position = tag_end + 1
+                continue
+            end = content.find(b">", close_at, limit)
+            if end == -1 or content[close_at + 9 : end].strip():
+                return None
+            pages.append((start, end + 1))
+            position = end + 1
+
+        root_close = b"</" + prolog.group("root")
+        tail = content[position:].strip()
+        if not tail.startswith(root_close) or tail[len(root_close) :].strip() != b">":
+            return None
+        return pages
+
+    def _find_tags(
+        self, content: mmap.mmap, prefix: bytes, start: int, end: int
+    ) -> List[int]:
+        """Returns the offset of every tag opened by `prefix` between two offsets.
+
+        A match only counts when the tag name ends right after `prefix`, so longer
+        names such as `<diagramX` are not taken for it.
+        """
+        offsets: List[int] = []
+
+        position = content.find(prefix, start, end)
+        while position != -1:
+            next_byte = content[position + len(prefix) : position + len(prefix) + 1]
+            if next_byte in TAG_NAME_DELIMITERS:
+                offsets.append(position)
+            position = content.find(prefix, position + len(prefix), end)
+
+        return offsets
+
+    @classmethod
+    def _index_page(
+        cls, file_path: str, page_range: Tuple[int, int]
+    ) -> DiagramPageIndexes:
+        """Indexes the objects of one `<diagram>` page and returns its indexes.
+
+        Parallel workers run this on a fresh, empty service that skips `__init__`, so
+        only the page bytes are read and the returned indexes hold just this page.
+        """
+        page_service = cls.__new__(cls)
+        IstarModel.__init__(page_service)
+        page_service.file_path = file_path
+
+        start, end = page_range
+        with open(file_path, "rb") as file:
+            file.seek(start)
+            page_bytes = file.read(end - start)
+
+        ownership = ActorOwnershipInputs()
+        try:
+            events = ET.iterparse(io.BytesIO(page_bytes), events=("start", "end"))
+            for obj in page_service._iter_objects_from_events(events, PAGE_OBJECT_PATH):
+                page_service._index_diagram_object(obj, ownership)
+        except ET.ParseError as exc:
+            logger.error(
+                "XML page parse error: path=%s, start=%s, end=%s, error=%s",
+                file_path,
+                start,
+                end,
+                exc,
+                exc_info=True,
+            )
+            raise
+
+        return DiagramPageIndexes(
+            intentional_elements=page_service._intentional_elements,
+            social_dependencies=page_service._social_dependencies,
+            internal_links=page_service._internal_links,
+            refinements=page_service._refinements,
+            ownership=ownership,
+        )
+
+    def _merge_page_indexes(
+        self, page: DiagramPageIndexes, ownership: ActorOwnershipInputs
+    ) -> None:
+        """Merges the indexes of one page into this service in document order.
+
+        Ids repeated on a later page overwrite the earlier entry in place, exactly as the
+        sequential loaders do, and ownership lookups are merged so parents and `owns`
+        links that cross pages are resolved together.
+        """
+        for element_type, elements in page.intentional_elements.items():
+            self._intentional_elements.setdefault(element_type, {}).update(elements)
+        self._social_dependencies.update(page.social_dependencies)
+        self._internal_links.update(page.internal_links)
+        self._refinements.update(page.refinements)
+        ownership.merge(page.ownership)
+
+    # ------------ Compressed Diagrams ------------
+    # Methods below inflate deflate+base64 `<diagram>` payloads without a full copy.
+    def _iter_compressed_diagram_objects(
+        self, diagram: ET.Element
+    ) -> Iterator[ET.Element]:
+        """Yields the objects stored in the compressed payload of one `<diagram>`.
+
+        draw.io may save a page as base64 text of the raw-deflated, URI-encoded
+        `mxGraphModel` instead of inline XML. The payload is decoded, inflated, and
+        parsed chunk by chunk, so the inflated XML is never held as one string.
+        """
+        payload = diagram.text
+        if not payload or not payload.strip():
+            return
+
+        parser = ET.XMLPullParser(events=("start", "end"))
+        events = self._iter_inflated_events(payload, parser)
+        yield from self._iter_objects_from_events(events, INFLATED_OBJECT_PATH)
+
+    def _iter_inflated_events(
+        self, payload: str, parser: ET.XMLPullParser
+    ) -> Iterator[Tuple[str, ET.Element]]:
+        """Feeds the inflated payload to a pull parser and yields its parse events."""
+        try:
+            chunks = self._iter_inflated_chunks(payload)
+            for chunk in self._iter_uri_decoded_chunks(chunks):
+                parser.feed(chunk)
+                yield from parser.read_events()
+            parser.close()
+            yield from parser.read_events()
+        except (binascii.Error, zlib.error) as exc:
+            logger.error(
+                "Compressed diagram could not be inflated: path=%s, error=%s",
+                self.file_path,
+                exc,
+            )
+            raise ValueError(f"No se pudo descomprimir el diagrama: {exc}") from exc
+
+    def _iter_inflated_chunks(self, payload: str) -> Iterator[bytes]:
+        """Yields the raw-inflated bytes of a base64 payload one chunk at a time."""
+        inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+
+        for compressed in self._iter_base64_chunks(payload):
+            inflated = inflater.decompress(compressed)
+            if inflated:
+                yield inflated
+
+        inflated = inflater.flush()
+        if inflated:
+            yield inflated
+
+    def _iter_base64_chunks(self, payload: str) -> Iterator[bytes]:
+        """Yields decoded base64 bytes in 4-character aligned slices of the payload.
+
+        Whitespace is dropped per slice and the unaligned tail is carried to the next
+        slice, so decoding never copies the whole payload at once.
+        """
+        carry = ""
+
+        for start in range(0, len(payload), COMPRESSED_CHUNK_CHARS):
+            text = carry + "".join(
+                payload[start : start + COMPRESSED_CHUNK_CHARS].split()
+            )
+            aligned_length = len(text) - len(text) % 4
+            carry = text[aligned_length:]
+            if aligned_length:
+                yield binascii.a2b_base64(text[:aligned_length])
+
+        if carry:
+            yield binascii.a2b_base64(carry)
+
+    def _iter_uri_decoded_chunks(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Yields the URI-decoded XML bytes of an inflated payload.
+
+        Current draw.io versions URI-encode the XML before deflating it, while older
+        ones deflate the XML directly. Escapes split across chunks are carried over.
+        """
+        is_uri_encoded = None
+        pending = b""
+
+        for chunk in chunks:
+            if is_uri_encoded is None:
+                is_uri_encoded = not chunk.lstrip().startswith(b"<")
+            if not is_uri_encoded:
+                yield chunk
+                continue
+
+            data = pending + chunk
+            split_at = data.rfind(b"%", max(len(data) - 2, 0))
+            if split_at == -1:
+                pending = b""
+            else:
+                pending = data[split_at:]
+                data = data[:split_at]
+            yield self._uri_decode(data)
+
+        if pending:
+            yield self._uri_decode(pending)
+
+    def _uri_decode(self, data: bytes) -> bytes:
+        """Decodes the `%XX` escapes of one URI-encoded chunk.
+
+        Escapes are rewritten as `\\xXX` so the C-level escape decoder can expand them,
+        which is much faster than `unquote_to_bytes` on large payloads. Chunks with a
+        malformed escape fall back to `unquote_to_bytes`, which leaves it untouched.
+        """
+        escaped = data.replace(b"\\", b"\\\\").replace(b"%", b"\\x")
+        try:
+            return codecs.escape_decode(escaped)[0]
+        except ValueError:
+            return unquote_to_bytes(data)
+
+    # ------------ Object Indexing ------------
+    # Methods below turn each raw diagram object into index entries and ownership data.
+    def _index_diagram_object(
+        self, obj: ET.Element, ownership: ActorOwnershipInputs
+    ) -> None:
+        """Indexes one draw.io object and records its ownership lookups.
 
         This helper merges semantic object data with graph-level mxCell data so the
-        downstream indexers can classify each element with full context.
+        indexers can classify each element with full context, and it is shared by the
+        DOM and streaming loaders so both produce the same indexes.
         """
-        objects = root.findall("./diagram/mxGraphModel/root/object")
-        raw_elements = []
+        obj_attrib = obj.attrib or {}
 
-        for obj in objects:
-            obj_attrib = obj.attrib or {}
+        mxcell = obj.find("mxCell")
+        mx_attrib = mxcell.attrib if mxcell is not None else None
 
-            mxcell = obj.find("mxCell")
-            mx_attrib = mxcell.attrib if mxcell is not None else {}
+        merged = dict(mx_attrib or {})
+        merged.update(obj_attrib)
 
-            merged = dict(mx_attrib)
-            merged.update(obj_attrib)
+        is_edge = mx_attrib is not None and mx_attrib.get("edge") == "1"
+        tag = "mxCell" if is_edge else obj.tag
 
-            is_edge = mx_attrib.get("edge") == "1"
-            tag = "mxCell" if is_edge else obj.tag
-            raw_elements.append({"tag": tag, "attrib": merged})
+        if merged:
+            self._index_intentional_element(tag, merged)
+            self._index_social_dependency(tag, merged)
+            self._index_internal_link(tag, merged)
+            self._index_refinement(tag, merged)
 
-        return raw_elements
+        self._collect_ownership_inputs(obj_attrib, mx_attrib, ownership)
 
     # ------------ Validations ------------
     # Methods below validate whether raw XML nodes match the supported iStar link types.
@@ -134,12 +631,9 @@ class XmlService(IstarModel):
             return
 
         # NOTE: Stores by type -> id without overwriting same-type elements
-        self._intentional_elements.setdefault(element_type, {})[id] = {
-            "id": id,
-            "type": element_type,
-            "tag": tag,
-            "label": formatted_label,
-        }
+        self._intentional_elements.setdefault(element_type, {})[id] = (
+            IntentionalElement(id=id, type=element_type, tag=tag, label=formatted_label)
+        )
 
     def _index_social_dependency(self, tag, attrib):
         """Indexes one social dependency edge by its id.
@@ -157,12 +651,9 @@ class XmlService(IstarModel):
         if not self._verify_social_dependency(tag, attrib):
             return
 
-        self._social_dependencies[id] = {
-            "id": id,
-            "source": source,
-            "target": target,
-            "label": self._format_label(label),
-        }
+        self._social_dependencies[id] = SocialDependency(
+            id=id, source=source, target=target, label=self._format_label(label)
+        )
 
     def _index_internal_link(self, tag, attrib):
         """Indexes one supported internal link between intentional elements.
@@ -188,13 +679,13 @@ class XmlService(IstarModel):
         if link_type not in internal_link_types:
             return
 
-        self._internal_links[id] = {
-            "id": id,
-            "type": link_type,
-            "source": source,
-            "target": target,
-            "label": formatted_label,
-        }
+        self._internal_links[id] = InternalLink(
+            id=id,
+            type=link_type,
+            source=source,
+            target=target,
+            label=formatted_label,
+        )
 
     def _index_refinement(self, tag, attrib):
         """Indexes one refinement edge by its id.
@@ -218,100 +709,95 @@ class XmlService(IstarModel):
         if link_type != "refinement":
             return
 
-        self._refinements[id] = {
-            "id": id,
-            "source": source,
-            "target": target,
-            "value": value,
-        }
+        self._refinements[id] = Refinement(
+            id=id, source=source, target=target, value=value
+        )
 
     # ------------ Actor Ownership Resolution ------------
     # Methods below derive which actor owns each relevant iStar element.
-    def _index_element_to_actor(self, root) -> dict:
-        """Builds the mapping `{element_id: actor_label}` from the parsed XML root.
+    def _collect_ownership_inputs(
+        self,
+        obj_attrib: dict,
+        mx_attrib: Optional[dict],
+        ownership: ActorOwnershipInputs,
+    ) -> None:
+        """Records the lookups of one object needed for actor-ownership resolution.
+
+        This helper keeps the parent, type, and label of each object together with the
+        `owns` links and ownable elements, so boundaries can be resolved after loading.
+        """
+        id = obj_attrib.get("id")
+        if id is None:
+            return
+
+        object_type = obj_attrib.get("type")
+        ownership.type_by_id[id] = object_type
+        ownership.label_by_id[id] = obj_attrib.get("label")
+
+        if mx_attrib is not None:
+            ownership.parent_by_id[id] = mx_attrib.get("parent")
+
+        if object_type in {"goal", "task", "resource"}:
+            ownership.candidate_ids.append(id)
+
+        if object_type != "owns" or mx_attrib is None:
+            return
+
+        source_id = mx_attrib.get("source")
+        target_id = mx_attrib.get("target")
+        if source_id and target_id:
+            ownership.owns_links.append((source_id, target_id))
+
+    def _index_element_to_actor(self, ownership: ActorOwnershipInputs) -> dict:
+        """Builds the mapping `{element_id: actor_label}` from the collected lookups.
 
         This helper derives ownership information so later transformations can attach
         actor traceability metadata to the generated UVL model.
         """
-        objects = root.findall("./diagram/mxGraphModel/root/object")
-        if not objects:
+        if not ownership.type_by_id:
             return {}
 
-        parent_by_id = {}
-        type_by_id = {}
-        label_by_id = {}
-        actor_by_boundary = {}
-
-        self._collect_object_indexes(
-            objects=objects,
-            parent_by_id=parent_by_id,
-            type_by_id=type_by_id,
-            label_by_id=label_by_id,
-            actor_by_boundary=actor_by_boundary,
-        )
+        actor_by_boundary = self._collect_actor_boundaries(ownership)
 
         element_to_actor = {}
 
         self._assign_element_to_actor(
-            objects=objects,
-            parent_by_id=parent_by_id,
+            candidate_ids=ownership.candidate_ids,
+            parent_by_id=ownership.parent_by_id,
             actor_by_boundary=actor_by_boundary,
             element_to_actor=element_to_actor,
         )
 
         return element_to_actor
 
-    def _collect_object_indexes(
-        self, objects, parent_by_id, type_by_id, label_by_id, actor_by_boundary
-    ) -> None:
-        """Fills the lookup dictionaries needed for actor-ownership resolution.
+    def _collect_actor_boundaries(self, ownership: ActorOwnershipInputs) -> dict:
+        """Returns the mapping `{boundary_id: actor_label}` derived from `owns` links.
 
-        This helper prepares the indexes that let the ownership step walk boundaries and
+        This helper prepares the index that lets the ownership step walk boundaries and
         resolve which actor controls each relevant element.
         """
-        owns_links = []
-
-        for object in objects:
-            id = object.attrib.get("id")
-            if id is None:
-                continue
-
-            type_by_id[id] = object.attrib.get("type")
-            label_by_id[id] = object.attrib.get("label")
-
-            mxcell = object.find("mxCell")
-            if mxcell is not None:
-                parent_by_id[id] = mxcell.attrib.get("parent")
-
-            if object.attrib.get("type") == "owns":
-                owns_links.append(object)
-
-        for object in owns_links:
-            mxcell = object.find("mxCell")
-            if mxcell is None:
-                continue
+        actor_by_boundary = {}
 
-            source_id = mxcell.attrib.get("source")
-            target_id = mxcell.attrib.get("target")
-            if not source_id or not target_id:
-                continue
-            if type_by_id.get(source_id) != "agent":
+        for source_id, target_id in ownership.owns_links:
+            if ownership.type_by_id.get(source_id) != "agent":
                 continue
 
-            raw_actor_label = label_by_id.get(source_id)
+            raw_actor_label = ownership.label_by_id.get(source_id)
             if not raw_actor_label:
                 continue
 
             actor_label = self._format_label(raw_actor_label)
             actor_by_boundary[target_id] = actor_label
 
-            target_parent = parent_by_id.get(target_id)
+            target_parent = ownership.parent_by_id.get(target_id)
             if target_parent:
                 actor_by_boundary[target_parent] = actor_label
 
+        return actor_by_boundary
+
     def _assign_element_to_actor(
         self,
-        objects,
+        candidate_ids,
         parent_by_id,
         actor_by_boundary,
         element_to_actor,
@@ -319,43 +805,242 @@ class XmlService(IstarModel):
         """Populates `element_to_actor` in place for goals, tasks, and resources.
 
         This helper walks the containment chain until it reaches an owned boundary so the
-        parser can preserve actor ownership in the in-memory model.
+        parser can preserve actor ownership in the in-memory model. Resolved containers
+        are memoized, so shared ancestors are walked once for the whole diagram.
         """
-        for object in objects:
-            id = object.attrib.get("id")
-            if id is None:
-                continue
+        actor_by_container: dict = {}
+
+        for id in candidate_ids:
+            actor_label = self._resolve_container_actor(
+                container_id=parent_by_id.get(id),
+                parent_by_id=parent_by_id,
+                actor_by_boundary=actor_by_boundary,
+                actor_by_container=actor_by_container,
+            )
+            if actor_label:
+                element_to_actor[id] = actor_label
 
-            if object.attrib.get("type") not in {"goal", "task", "resource"}:
-                continue
+    def _resolve_container_actor(
+        self,
+        container_id,
+        parent_by_id,
+        actor_by_boundary,
+        actor_by_container,
+    ):
+        """Returns the actor owning one container, or `None` when no boundary owns it.
 
-            current_parent = parent_by_id.get(id)
-            while current_parent:
-                actor_label = actor_by_boundary.get(current_parent)
-                if actor_label:
-                    element_to_actor[id] = actor_label
-                    break
-                current_parent = parent_by_id.get(current_parent)
+        This helper stops at the first container already resolved, then stores the
+        answer for every container it visited, so each ancestor is resolved only once.
+        A parent chain that loops back on itself is reported and treated as unowned.
+        """
+        visited: List[str] = []
+        visited_ids = set()
+        actor_label = None
+
+        current_id = container_id
+        while current_id:
+            if current_id in actor_by_container:
+                actor_label = actor_by_container[current_id]
+                break
+            if current_id in visited_ids:
+                logger.warning(
+                    "Cyclic parent chain ignored: path=%s, container_id=%s",
+                    self.file_path,
+                    current_id,
+                )
+                break
+
+            visited.append(current_id)
+            visited_ids.add(current_id)
+
+            actor_label = actor_by_boundary.get(current_id)
+            if actor_label:
+                break
+            current_id = parent_by_id.get(current_id)
+
+        for visited_id in visited:
+            actor_by_container[visited_id] = actor_label
+        return actor_label
 
     # ------------ Index Build ------------
     # Methods below orchestrate the full XML-to-index parsing process.
     def _build_indexes(self):
-        """Builds all in-memory indexes from the XML file.
+        """Builds all in-memory indexes from the fully parsed XML tree.
 
-        This helper is the main internal parsing step that fills every inherited iStar
-        index before public consumers start querying the model.
+        This helper is the default parsing step that fills every inherited iStar index
+        before public consumers start querying the model.
         """
         root = self._get_root()
-        raw_elements = self._get_raw_diagram_elements(root)
+        ownership = ActorOwnershipInputs()
 
-        for element in raw_elements:
-            tag = element.get("tag")
-            attrib = element.get("attrib", {})
-            if not attrib:
-                continue
+        for obj in self._iter_tree_objects(root):
+            self._index_diagram_object(obj, ownership)
+
+        self._element_to_actor = self._index_element_to_actor(ownership)
+        self._build_lookup_indexes()
+
+    def _build_indexes_streaming(self):
+        """Builds all in-memory indexes in one streaming pass over the XML file.
+
+        This helper fills the same indexes as `_build_indexes`, but each object is indexed
+        and discarded as soon as its subtree ends, so the full tree is never held.
+        """
+        ownership = ActorOwnershipInputs()
+
+        for obj in self._iter_streamed_objects():
+            self._index_diagram_object(obj, ownership)
 
-            self._index_intentional_element(tag, attrib)
-            self._index_social_dependency(tag, attrib)
-            self._index_internal_link(tag, attrib)
-            self._index_refinement(tag, attrib)
-        self._element_to_actor = self._index_element_to_actor(root)
+        self._element_to_actor = self._index_element_to_actor(ownership)
+        self._build_lookup_indexes()
+
+    def _build_indexes_parallel(self) -> bool:
+        """Builds all in-memory indexes by indexing each `<diagram>` page in parallel.
+
+        Pages go to the shared process pool. This helper returns `False` without
+        touching any index when the file has fewer than two pages, only one worker is
+        available, or it already runs inside a pool worker, so the caller can fall back
+        to a sequential loader. Actor ownership is resolved once on the merged lookups.
+        """
+        executor = get_shared_process_pool()
+        pages = self._find_diagram_pages()
+        max_workers = self.max_workers or config.XML_PARSE_WORKERS
+        workers = min(
+            len(pages),
+            max_workers or config.CPU_EXECUTOR_WORKERS,
+            config.CPU_EXECUTOR_WORKERS,
+        )
+        if executor is None or workers < 2:
+            logger.debug(
+                "Parallel parse skipped: path=%s, pages=%s, workers=%s, pool=%s",
+                self.file_path,
+                len(pages),
+                workers,
+                executor is not None,
+            )
+            return False
+
+        logger.debug(
+            "Parallel parse started: path=%s, pages=%s, workers=%s",
+            self.file_path,
+            len(pages),
+            workers,
+        )
+        ownership = ActorOwnershipInputs()
+        page_indexes = executor.map(
+            XmlService._index_page,
+            repeat(self.file_path),
+            pages,
+            chunksize=max(1, len(pages) // workers),
+        )
+        for page in page_indexes:
+            self._merge_page_indexes(page, ownership)
+
+        self._element_to_actor = self._index_element_to_actor(ownership)
+        self._build_lookup_indexes()
+        return True
+
+
+# ====== Private Helpers ======
+# Internal functions below locate the persisted index of one XML file.
+
+
+def _istar_index_path(content_hash: str) -> Path:
+    """Returns the pickle path of the persisted index of one content hash."""
+    return ISTAR_INDEX_DIR / f"{content_hash}.v{ISTAR_INDEX_FORMAT}.pickle"
+
+
+# ====== Public API ======
+# Functions below expose cached access to parsed iStar models.
+
+
+def read_root_tag(file_path: str) -> str:
+    """Returns the root tag of one XML file, reading only up to its first element."""
+    _, root = next(ET.iterparse(file_path, events=("start",)))
+    return root.tag
+
+
+def load_istar_index(
+    file_path: str, content_hash: Optional[str] = None
+) -> Optional[PersistedIstarIndex]:
+    """Returns the persisted index of one XML file, or None when there is none.
+
+    The file is only hashed when some index was persisted and `content_hash` is not
+    given, so deployments that never pre-index uploads pay nothing. An unreadable
+    pickle is logged and ignored.
+    """
+    if not ISTAR_INDEX_DIR.is_dir():
+        return None
+    index_path = _istar_index_path(content_hash or file_content_hash(file_path))
+    try:
+        with index_path.open("rb") as file:
+            persisted = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning(
+            "Persisted iStar index ignored: path=%s, index_path=%s, error=%s",
+            file_path,
+            index_path,
+            exc,
+        )
+        return None
+
+    logger.debug("Persisted iStar index loaded: path=%s", file_path)
+    return persisted
+
+
+def persist_istar_index(
+    content_hash: str, model: IstarModel, cim_metrics: Dict[str, Any]
+) -> Path:
+    """Writes the parsed model and CIM metrics of one XML content under its hash."""
+    index_path = _istar_index_path(content_hash)
+    persisted = PersistedIstarIndex(model=model, cim_metrics=cim_metrics)
+    ISTAR_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    with atomic_writer(index_path, binary=True) as file:
+        pickle.dump(persisted, file, protocol=pickle.HIGHEST_PROTOCOL)
+    logger.info(
+        "iStar index persisted: content_hash=%s, index_path=%s",
+        content_hash,
+        index_path,
+    )
+    return index_path
+
+
+def load_istar_model(file_path: str) -> IstarModel:
+    """Returns the parsed iStar model of one XML file, reusing the cached parse.
+
+    Endpoints call this instead of building `XmlService` directly, so back-to-back
+    requests over an unchanged file skip XML parsing entirely. The cache key includes
+    the file mtime and size, and the returned model is shared, so callers must treat it
+    as read-only. On a miss, the index persisted by a pre-indexed upload is loaded
+    before falling back to parsing the XML.
+    """
+    path = Path(file_path)
+    stat = path.stat()
+    resolved_path = str(path.resolve())
+    key = (resolved_path, stat.st_mtime_ns, stat.st_size)
+
+    cached_model = istar_model_cache.get(key)
+    if cached_model is not None:
+        logger.debug("iStar model cache hit: path=%s", file_path)
+        return cached_model
+
+    stale_entries = istar_model_cache.discard_where(
+        lambda cached_key: cached_key[0] == resolved_path
+    )
+    logger.debug(
+        "iStar model cache miss: path=%s, stale_entries=%s", file_path, stale_entries
+    )
+
+    persisted = load_istar_index(file_path)
+    if persisted is not None:
+        model = persisted.model
+        model.file_path = file_path
+    else:
+        model = XmlService(
+            file_path,
+            streaming=config.XML_STREAMING_LOADER,
+            parallel=config.XML_PARALLEL_PAGES,
+        )
+    istar_model_cache.put(key, model, size=stat.st_size)
+    return model
@@ -0,0 +1,292 @@
+"""Batch runs of one transformation flow over many iStar XML files."""
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+
+from app.core.config import config
+from app.core.executors import run_in_io_executor
+from app.core.hashing import file_content_hash
+from app.services.pipeline import FlowKind, run_flow
+
+logger = logging.getLogger(__name__)
+
+# ------------ Archive Layout ------------
+# Root directory that holds one extraction directory per archive content hash.
+BATCH_ARCHIVES_DIR = Path(config.BATCH_ARCHIVES_DIR)
+
+# Extension of the archive members taken as batch inputs.
+XML_EXTENSION = ".xml"
+
+
+class BatchInputError(Exception):
+    """Raised when a batch has no inputs, too many inputs, or an unreadable archive."""
+
+
+class BatchItemResult(BaseModel):
+    """Stores the outcome of one file of a batch.
+
+    Failed files keep their error message and leave the other fields empty, so one bad
+    model never hides the results of the rest of the batch.
+    """
+
+    input_xml: str
+    status: Literal["succeeded", "failed"]
+    elapsed_ms: float
+    output_uvl: Optional[str] = None
+    output_puml: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class BatchResult(BaseModel):
+    """Groups the per-file results of a batch with its aggregated metrics.
+
+    Aggregated metrics add up the counts of every succeeded file per level. Averages
+    such as densities are left out, since they cannot be combined without weights.
+    """
+
+    kind: FlowKind
+    total_files: int
+    succeeded: int
+    failed: int
+    elapsed_ms: float
+    results: List[BatchItemResult]
+    metrics: Dict[str, Any]
+
+
+# ====== Private Helpers ======
+# Internal functions below resolve batch inputs, run each file, and add up metrics.
+
+
+# ------------ Archive Extraction ------------
+# Functions below unpack the XML members of one archive into a stable directory.
+def _extract_archive(archive_path: str) -> List[str]:
+    """Extracts the XML members of one zip archive and returns their paths.
+
+    The extraction directory is named after the archive content hash, so a repeated
+    batch over the same archive reuses the extracted files and their cached stages.
+    Members whose path leaves the extraction directory are skipped.
+    """
+    if not Path(archive_path).is_file():
+        raise BatchInputError(f"No se encontró el archivo ZIP: {archive_path}")
+    if not zipfile.is_zipfile(archive_path):
+        raise BatchInputError(f"El archivo no es un ZIP válido: {archive_path}")
+
+    target_dir = BATCH_ARCHIVES_DIR / file_content_hash(archive_path)[:32]
+    if not target_dir.is_dir():
+        BATCH_ARCHIVES_DIR.mkdir(parents=True, exist_ok=True)
+        temp_dir = Path(tempfile.mkdtemp(dir=BATCH_ARCHIVES_DIR, prefix=".extract."))
+        try:
+            _extract_xml_members(archive_path, temp_dir)
+            os.rename(temp_dir, target_dir)
+        except OSError:
+            if not target_dir.is_dir():
+                raise
+            logger.debug("Batch archive extracted concurrently: path=%s", archive_path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return sorted(
+        str(path)
+        for path in target_dir.rglob("*")
+        if path.is_file() and path.suffix.lower() == XML_EXTENSION
+    )
+
+
+def _extract_xml_members(archive_path: str, target_dir: Path) -> None:
+    """Writes the XML members of one archive below `target_dir`.
+
+    Members are selected and checked against the archive limits from the central
+    directory before any of them is extracted.
+    """
+    root = target_dir.resolve()
+    with zipfile.ZipFile(archive_path) as archive:
+        members = []
+        for member in archive.infolist():
+            if member.is_dir() or not member.filename.lower().endswith(XML_EXTENSION):
+                continue
+            destination = (root / member.filename).resolve()
+            if not destination.is_relative_to(root):
+                logger.warning(
+                    "Batch archive member skipped: path=%s, member=%s",
+                    archive_path,
+                    member.filename,
+                )
+                continue
+            members.append((member, destination))
+
+        _check_archive_members(archive_path, [member for member, _ in members])
+        for member, destination in members:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            with archive.open(member) as source, destination.open("wb") as file:
+                shutil.copyfileobj(source, file)
+
+
+def _check_archive_members(archive_path: str, members: List[zipfile.ZipInfo]) -> None:
+    """Rejects an archive whose XML members exceed the batch file or byte limits.
+
+    Sizes come from the central directory. `zipfile` never inflates a member past its
+    declared `file_size`, so the sum bounds what the extraction writes to disk.
+    """
+    if len(members) > config.BATCH_MAX_FILES:
+        raise BatchInputError(
+            f"El lote supera el máximo de archivos: max_files={config.BATCH_MAX_FILES}"
+        )
+
+    total_bytes = sum(member.file_size for member in members)
+    if total_bytes > config.BATCH_ARCHIVE_MAX_BYTES:
+        logger.warning(
+            "Batch archive rejected: path=%s, members=%s, total_bytes=%s",
+            archive_path,
+            len(members),
+            total_bytes,
+        )
+        raise BatchInputError(
+            "El ZIP supera el tamaño máximo descomprimido: "
+            f"max_bytes={config.BATCH_ARCHIVE_MAX_BYTES}"
+        )
+
+
+# ------------ File Runs ------------
+# Functions below run the flow over one file and isolate its failure.
+async def _run_batch_item(
+    kind: FlowKind, input_path: str, semaphore: asyncio.Semaphore
+) -> BatchItemResult:
+    """Runs the flow over one file and returns its result, catching any failure."""
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            result = await run_flow(kind, input_path)
+        except Exception as exc:
+            logger.error(
+                "Batch file failed: kind=%s, input_path=%s, error=%s",
+                kind,
+                input_path,
+                exc,
+            )
+            return BatchItemResult(
+                input_xml=input_path,
+                status="failed",
+                elapsed_ms=_elapsed_ms(start),
+                error=str(exc),
+            )
+
+    payload = result.to_payload(input_path)
+    return BatchItemResult(
+        input_xml=input_path,
+        status="succeeded",
+        elapsed_ms=_elapsed_ms(start),
+        output_uvl=payload["output_uvl"],
+        output_puml=payload.get("output_puml"),
+        metrics=payload["metrics"],
+    )
+
+
+def _elapsed_ms(start: float) -> float:
+    """Returns the milliseconds elapsed since one `time.perf_counter()` reading."""
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+# ------------ Metric Aggregation ------------
+# Functions below add up the integer counts of several metric dictionaries.
+def _add_counts(total: Dict[str, Any], metrics: Dict[str, Any]) -> None:
+    """Adds the integer counts of `metrics` into `total`, recursing into sections.
+
+    For example, adding `{"tasks": 5, "density": {"avg": 0.5}}` to `{"tasks": 2}`
+    gives `{"tasks": 7, "density": {}}`.
+    """
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            _add_counts(total.setdefault(key, {}), value)
+        elif isinstance(value, int) and not isinstance(value, bool):
+            total[key] = total.get(key, 0) + value
+
+
+# ====== Public API ======
+# Functions below resolve batch inputs and run one flow over all of them.
+
+
+async def resolve_batch_inputs(
+    paths: List[str], archive: Optional[str] = None
+) -> List[str]:
+    """Returns the unique XML paths of one batch, in request order.
+
+    Paths from the archive follow the explicit paths. Raises `BatchInputError` when
+    the batch is empty or exceeds `BATCH_MAX_FILES`.
+    """
+    input_paths = list(paths)
+    if archive:
+        try:
+            input_paths += await run_in_io_executor(_extract_archive, archive)
+        except (OSError, zipfile.BadZipFile) as exc:
+            raise BatchInputError(f"No se pudo leer el archivo ZIP: {exc}") from exc
+
+    unique_paths = list(dict.fromkeys(input_paths))
+    if not unique_paths:
+        raise BatchInputError("El lote no contiene archivos XML")
+    if len(unique_paths) > config.BATCH_MAX_FILES:
+        raise BatchInputError(
+            f"El lote supera el máximo de archivos: max_files={config.BATCH_MAX_FILES}"
+        )
+    return unique_paths
+
+
+async def run_batch(
+    kind: FlowKind,
+    input_paths: List[str],
+    max_concurrency: Optional[int] = None,
+) -> BatchResult:
+    """Runs one flow over every input file and returns per-file and total results.
+
+    Files fan out over the shared CPU executor, whose worker processes keep their
+    services and parse caches warm between files. At most `max_concurrency` files are
+    in flight, and a failing file is reported in its own result without stopping the
+    others.
+    """
+    limit = max(1, max_concurrency or config.BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(limit)
+    start = time.perf_counter()
+    logger.info(
+        "Batch started: kind=%s, files=%s, max_concurrency=%s",
+        kind,
+        len(input_paths),
+        limit,
+    )
+
+    results = await asyncio.gather(
+        *(_run_batch_item(kind, path, semaphore) for path in input_paths)
+    )
+
+    totals: Dict[str, Any] = {}
+    for item in results:
+        if item.metrics is not None:
+            _add_counts(totals, item.metrics)
+
+    succeeded = sum(1 for item in results if item.status == "succeeded")
+    batch = BatchResult(
+        kind=kind,
+        total_files=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        elapsed_ms=_elapsed_ms(start),
+        results=list(results),
+        metrics=totals,
+    )
+    logger.info(
+        "Batch completed: kind=%s, files=%s, succeeded=%s, failed=%s, elapsed_ms=%s",
+        kind,
+        batch.total_files,
+        batch.succeeded,
+        batch.failed,
+        batch.elapsed_ms,
+    )
+    return batch
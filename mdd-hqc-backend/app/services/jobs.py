@@ -0,0 +1,542 @@
+"""Job queue that runs transformation flows in the background of one host process."""
+
+import asyncio
+import datetime as dt
+import fcntl
+import logging
+import os
+import re
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO, Any, Dict, List, Literal, Optional, Set, Tuple
+
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import config
+from app.core.executors import run_in_io_executor
+from app.core.storage import atomic_write_text, wait_for_artifact
+from app.services.pipeline import FLOW_STAGES, FlowKind, StageEvent, run_flow
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+# Statuses after which a job never changes again.
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+# ------------ Job Store ------------
+# Directory that keeps one JSON record per job, and the lock held by the job host.
+JOBS_DIR = Path(config.JOBS_DIR)
+JOBS_LOCK_NAME = ".lock"
+
+# Suffixes of job records and of cancellation requests left for the job host.
+RECORD_SUFFIX = ".json"
+CANCEL_SUFFIX = ".cancel"
+
+# Shape of the ids given by `submit`; other ids never reach the filesystem.
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+# Artifact texts left out of persisted records; the artifact links serve them.
+PERSISTED_RESULT_EXCLUDE = {"result": {"uvl_content", "puml_content"}}
+
+# Result fields holding artifact paths, and the link that serves each one over HTTP.
+ARTIFACT_LINKS = {"uvl": "output_uvl", "puml": "output_puml"}
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue already holds its maximum depth."""
+
+
+class Job(BaseModel):
+    """Represents one submitted transformation and its progress.
+
+    The record is updated in place by the worker that runs it, so a status request
+    always returns the current stage. `result` holds the same fields as the synchronous
+    transformation endpoint once the job succeeds.
+    """
+
+    id: str
+    kind: FlowKind
+    input_path: str
+    status: JobStatus = "queued"
+    stage: Optional[str] = None
+    completed_stages: int = 0
+    total_stages: int
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    links: Dict[str, str] = {}
+
+
+class JobManager:
+    """Runs submitted jobs on a fixed number of workers fed by a bounded queue.
+
+    Bursts are accepted up to the queue depth and rejected beyond it, so the number of
+    pending pipelines never grows without limit. Finished jobs are kept for polling
+    until the history limit evicts the oldest ones. Every job is written to `JOBS_DIR`,
+    and the server process holding the lock there is the job host: it runs the queue,
+    adopts the jobs other server processes submit, and resumes unfinished jobs after a
+    restart. The other processes serve the job API from the persisted records, and one
+    of them takes over when the host goes away.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue_depth: int,
+        max_history: int,
+        jobs_dir: Path = JOBS_DIR,
+        poll_seconds: float = config.JOB_POLL_SECONDS,
+    ):
+        """Initializes the manager without starting workers.
+
+        Workers start once `start` makes this process the job host, inside the running
+        event loop, so the manager can be created at import time.
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_depth = max_queue_depth
+        self.max_history = max_history
+        self.jobs_dir = jobs_dir
+        self.poll_seconds = poll_seconds
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._saves: Dict[str, asyncio.Task] = {}
+        self._poll_task: Optional[asyncio.Task] = None
+        self._lock_file: Optional[IO] = None
+        self._stopping = False
+
+    @property
+    def is_host(self) -> bool:
+        """Returns whether this process holds the lock and runs the job queue."""
+        return self._lock_file is not None
+
+    # ====== Private Helpers ======
+    # Internal methods below start workers, run jobs, and persist their records.
+
+    # ------------ Workers ------------
+    # Methods below pull jobs from the queue and run their flow.
+    def _ensure_workers(self) -> asyncio.Queue:
+        """Returns the job queue, starting the workers on first use."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_depth)
+            self._workers = [
+                asyncio.create_task(self._worker(index), name=f"mdd-hqc-job-{index}")
+                for index in range(self.max_concurrency)
+            ]
+            logger.info(
+                "Job workers started: workers=%s, max_queue_depth=%s",
+                self.max_concurrency,
+                self.max_queue_depth,
+            )
+        return self._queue
+
+    async def _worker(self, index: int) -> None:
+        """Runs queued jobs one at a time until the manager stops."""
+        queue = self._queue
+        while True:
+            job_id = await queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is None or job.status != "queued":
+                    continue
+                task = asyncio.create_task(self._run_job(job))
+                self._tasks[job_id] = task
+                try:
+                    await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    # A cancelled job ends here; a cancelled worker stops as well.
+                    if not task.done():
+                        task.cancel()
+                    if asyncio.current_task().cancelling():
+                        raise
+            finally:
+                self._tasks.pop(job_id, None)
+                queue.task_done()
+
+    async def _run_job(self, job: Job) -> None:
+        """Runs the flow of one job and records its progress and outcome."""
+        job.status = "running"
+        job.started_at = _now()
+        self._save(job)
+        logger.info("Job started: job_id=%s, kind=%s", job.id, job.kind)
+
+        stages = FLOW_STAGES[job.kind]
+
+        def on_stage(event: StageEvent) -> None:
+            if event.stage not in stages:
+                return
+            if event.status == "started":
+                job.stage = event.stage
+            else:
+                job.completed_stages += 1
+            self._save(job)
+
+        try:
+            result = await run_flow(job.kind, job.input_path, on_stage=on_stage)
+            payload = result.to_payload(job.input_path)
+            # Other server processes serve the artifacts from disk once the job ends.
+            for field in ARTIFACT_LINKS.values():
+                if payload.get(field) is not None:
+                    await wait_for_artifact(Path(payload[field]))
+        except asyncio.CancelledError:
+            if self._stopping:
+                logger.info("Job interrupted by shutdown: job_id=%s", job.id)
+                raise
+            self._finish(job, "cancelled")
+            logger.info("Job cancelled while running: job_id=%s", job.id)
+            raise
+        except Exception as exc:
+            job.error = str(exc)
+            self._finish(job, "failed")
+            logger.error(
+                "Job failed: job_id=%s, stage=%s, error=%s",
+                job.id,
+                job.stage,
+                exc,
+                exc_info=True,
+            )
+            return
+
+        job.result = payload
+        for artifact, field in ARTIFACT_LINKS.items():
+            if job.result.get(field) is not None:
+                job.links[f"result_{artifact}"] = f"/jobs/{job.id}/{artifact}"
+        self._finish(job, "succeeded")
+        logger.info("Job succeeded: job_id=%s, kind=%s", job.id, job.kind)
+
+    # ------------ History ------------
+    # Methods below close finished jobs and bound the number kept for polling.
+    def _finish(self, job: Job, status: JobStatus) -> None:
+        """Marks one job as finished and evicts the oldest finished jobs over the limit."""
+        job.status = status
+        job.finished_at = _now()
+        self._save(job)
+        self._trim_history()
+
+    def _trim_history(self) -> None:
+        """Forgets the oldest finished jobs beyond `max_history`, with their records."""
+        finished = [
+            job_id
+            for job_id, item in self._jobs.items()
+            if item.status in FINISHED_STATUSES
+        ]
+        for job_id in finished[: max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
+            self._save_record(job_id, None)
+
+    # ------------ Job Store ------------
+    # Methods below persist job records on the I/O executor, one write at a time per job.
+    def _record_path(self, job_id: str) -> Path:
+        """Returns the path of the JSON record of one job."""
+        return self.jobs_dir / f"{job_id}{RECORD_SUFFIX}"
+
+    def _save(self, job: Job) -> asyncio.Task:
+        """Starts writing the record of one job, without its artifact texts."""
+        return self._save_record(
+            job.id, job.model_dump_json(exclude=PERSISTED_RESULT_EXCLUDE)
+        )
+
+    def _save_record(self, job_id: str, content: Optional[str]) -> asyncio.Task:
+        """Starts writing, or with None deleting, the record of one job.
+
+        Writes of one job are chained, so a slow earlier write never lands over a
+        later one. Returns the task, which callers await when the record must be on
+        disk before they answer. Must be called from the running event loop.
+        """
+        previous = self._saves.get(job_id)
+        task = asyncio.create_task(self._write_record(job_id, content, previous))
+        self._saves[job_id] = task
+        task.add_done_callback(lambda done: self._forget_save(job_id, done))
+        return task
+
+    async def _write_record(
+        self, job_id: str, content: Optional[str], previous: Optional[asyncio.Task]
+    ) -> None:
+        """Writes one record on the I/O executor after the previous write of its job."""
+        if previous is not None:
+            await asyncio.wait({previous})
+        path = self._record_path(job_id)
+        if content is None:
+            await run_in_io_executor(path.unlink, missing_ok=True)
+        else:
+            await run_in_io_executor(atomic_write_text, path, content)
+
+    def _forget_save(self, job_id: str, task: asyncio.Task) -> None:
+        """Drops one finished record write and logs its failure, if any."""
+        if self._saves.get(job_id) is task:
+            del self._saves[job_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "Job record write failed: job_id=%s, error=%s", job_id, task.exception()
+            )
+
+    def _read_record(self, job_id: str) -> Optional[Job]:
+        """Reads the persisted record of one job, or None when it is missing or unreadable."""
+        record_path = self._record_path(job_id)
+        try:
+            return Job.model_validate_json(record_path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValidationError) as exc:
+            logger.warning("Job record ignored: path=%s, error=%s", record_path, exc)
+            return None
+
+    def _scan_records(self, known: Set[str]) -> Tuple[List[Job], List[str]]:
+        """Returns the records not in `known`, in submission order, and the cancel requests.
+
+        Runs on the I/O executor. Cancel requests are removed as they are read, since
+        the job host applies each one once.
+        """
+        jobs: List[Job] = []
+        cancelled: List[str] = []
+        for path in self.jobs_dir.iterdir():
+            job_id = path.stem
+            if path.suffix == CANCEL_SUFFIX:
+                cancelled.append(job_id)
+                path.unlink(missing_ok=True)
+            elif path.suffix == RECORD_SUFFIX and job_id not in known:
+                job = self._read_record(job_id)
+                if job is not None:
+                    jobs.append(job)
+        jobs.sort(key=lambda job: job.created_at)
+        return jobs, cancelled
+
+    def _count_queued_records(self) -> int:
+        """Counts the persisted jobs still waiting for the job host, on the I/O executor."""
+        jobs, _ = self._scan_records(set())
+        return sum(1 for job in jobs if job.status == "queued")
+
+    # ------------ Job Host ------------
+    # Methods below take the job host lock and adopt the persisted jobs.
+    def _acquire_lock(self) -> Optional[IO]:
+        """Takes the job host lock without waiting, or returns None when it is held."""
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        lock_file = (self.jobs_dir / JOBS_LOCK_NAME).open("w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    async def _try_become_host(self) -> None:
+        """Makes this process the job host when the lock is free, adopting every job."""
+        lock_file = await run_in_io_executor(self._acquire_lock)
+        if lock_file is None:
+            return
+        self._lock_file = lock_file
+        logger.info("Job host started: pid=%s, jobs_dir=%s", os.getpid(), self.jobs_dir)
+        jobs, cancelled = await run_in_io_executor(self._scan_records, set())
+        self._adopt(jobs)
+        for job_id in cancelled:
+            self._cancel_local(job_id)
+
+    def _adopt(self, jobs: List[Job]) -> None:
+        """Takes persisted jobs into the queue of this job host.
+
+        Unfinished jobs, whether submitted by another server process or interrupted
+        by a restart, start over from their first stage; the stage cache and the
+        content-addressed artifacts make repeated stages cheap. Jobs that no longer
+        fit in the queue are marked as failed.
+        """
+        queued = 0
+        for job in jobs:
+            self._jobs[job.id] = job
+            if job.status in FINISHED_STATUSES:
+                continue
+
+            job.status = "queued"
+            job.stage = None
+            job.completed_stages = 0
+            job.started_at = None
+            try:
+                self._ensure_workers().put_nowait(job.id)
+            except asyncio.QueueFull:
+                job.error = (
+                    f"Cola de trabajos llena: max_queue_depth={self.max_queue_depth}"
+                )
+                self._finish(job, "failed")
+                continue
+            self._save(job)
+            queued += 1
+
+        self._trim_history()
+        if jobs:
+            logger.info("Jobs adopted: jobs=%s, queued=%s", len(jobs), queued)
+
+    async def _poll(self) -> None:
+        """Adopts new jobs and cancel requests as host, or waits to take over the lock."""
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                if not self.is_host:
+                    await self._try_become_host()
+                    continue
+                jobs, cancelled = await run_in_io_executor(
+                    self._scan_records, set(self._jobs)
+                )
+                self._adopt(jobs)
+                for job_id in cancelled:
+                    self._cancel_local(job_id)
+            except Exception as exc:
+                logger.error("Job poll failed: error=%s", exc, exc_info=True)
+
+    def _cancel_local(self, job_id: str) -> Optional[Job]:
+        """Cancels one job held by this job host and returns its record."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        else:
+            self._finish(job, "cancelled")
+            logger.info("Job cancelled while queued: job_id=%s", job_id)
+        return job
+
+    # ====== Public API ======
+    # Methods below submit, inspect, cancel, and stop jobs.
+
+    # ------------ Job Control ------------
+    # Methods below are called by the jobs API from any server process.
+    async def submit(self, kind: FlowKind, input_path: str) -> Job:
+        """Queues one transformation and returns its job record.
+
+        The record is on disk before this returns, so any server process can answer
+        for it. Outside the job host the job waits on disk until the host adopts it.
+        Raises `JobQueueFullError` when `max_queue_depth` jobs are already waiting.
+        """
+        job_id = uuid.uuid4().hex
+        job = Job(
+            id=job_id,
+            kind=kind,
+            input_path=input_path,
+            total_stages=len(FLOW_STAGES[kind]),
+            created_at=_now(),
+            links={"self": f"/jobs/{job_id}"},
+        )
+        queue_full = JobQueueFullError(
+            f"Cola de trabajos llena: max_queue_depth={self.max_queue_depth}"
+        )
+
+        if self.is_host:
+            queue = self._ensure_workers()
+            try:
+                queue.put_nowait(job_id)
+            except asyncio.QueueFull as exc:
+                raise queue_full from exc
+            self._jobs[job_id] = job
+            queue_depth = queue.qsize()
+        else:
+            queue_depth = await run_in_io_executor(self._count_queued_records)
+            if queue_depth >= self.max_queue_depth:
+                raise queue_full
+
+        await self._save(job)
+        logger.info(
+            "Job queued: job_id=%s, kind=%s, input_path=%s, queue_depth=%s, host=%s",
+            job_id,
+            kind,
+            input_path,
+            queue_depth,
+            self.is_host,
+        )
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Returns one job record, or None when it is unknown or already evicted.
+
+        The job host answers from memory; other server processes read the record the
+        host persisted, which trails the live record by at most one write.
+        """
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        return await run_in_io_executor(self._read_record, job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancels one queued or running job and returns its record.
+
+        A queued job is skipped by the workers. A running job stops at its next await;
+        a stage already handed to an executor finishes in the background and only its
+        result is dropped. Outside the job host a cancel request is left for the host,
+        which applies it on its next poll. Finished jobs are returned unchanged.
+        """
+        if self.is_host and job_id in self._jobs:
+            return self._cancel_local(job_id)
+
+        job = await self.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+        cancel_path = self.jobs_dir / f"{job_id}{CANCEL_SUFFIX}"
+        await run_in_io_executor(atomic_write_text, cancel_path, "")
+        logger.info("Job cancellation forwarded to the job host: job_id=%s", job_id)
+        return job
+
+    # ------------ Lifecycle ------------
+    # Methods below join the job host election and stop the job runner at shutdown.
+    async def start(self) -> None:
+        """Makes this process the job host if the lock is free, then keeps polling.
+
+        Never fails over the lock: a server process that does not get it still serves
+        the job API, and takes over the queue if the current host goes away.
+        """
+        if self._poll_task is not None:
+            return
+        await self._try_become_host()
+        if not self.is_host:
+            logger.info(
+                "Job host runs in another process: pid=%s, jobs_dir=%s",
+                os.getpid(),
+                self.jobs_dir,
+            )
+        self._poll_task = asyncio.create_task(self._poll(), name="mdd-hqc-job-poll")
+
+    async def stop(self) -> None:
+        """Cancels every worker and running job, leaving finished jobs untouched.
+
+        Jobs cancelled here keep their persisted `queued` or `running` record, so the
+        next job host queues them again. Pending record writes finish before the job
+        host lock is released.
+        """
+        self._stopping = True
+        tasks = [*self._tasks.values(), *self._workers]
+        if self._poll_task is not None:
+            tasks.append(self._poll_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._saves:
+            await asyncio.wait(list(self._saves.values()))
+
+        self._queue = None
+        self._workers = []
+        self._poll_task = None
+        self._jobs.clear()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self._stopping = False
+        logger.info("Job workers stopped")
+
+
+def _now() -> str:
+    """Returns the current UTC time in ISO 8601 format."""
+    return dt.datetime.now(tz=dt.timezone.utc).isoformat()
+
+
+# ------------ Shared Manager ------------
+# Process-wide job manager used by the jobs API.
+job_manager = JobManager(
+    max_concurrency=config.JOB_MAX_CONCURRENCY,
+    max_queue_depth=config.JOB_QUEUE_MAX_DEPTH,
+    max_history=config.JOB_HISTORY_MAX_ENTRIES,
+)
@@ -2,7 +2,13 @@
 
 import logging
 from typing import Any, Dict
-from app.models.istar import IstarModel
+from app.models.istar import (
+    CONTRIBUTION,
+    NEEDED_BY,
+    QUALIFICATION_LINK,
+    REFINEMENT,
+    IstarModel,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -49,19 +55,9 @@ class IstarMetricsService:
         social_dependencies = self.xml_service.get_social_dependencies()
         metrics["social_dependencies"] = len(social_dependencies)
 
-        internal_links = self.xml_service.get_internal_links()
-        needed_by_count = 0
-        qualification_count = 0
-        contribution_count = 0
-
-        for link in internal_links.values():
-            link_type = link.get("type")
-            if link_type == "needed-by":
-                needed_by_count += 1
-            elif link_type == "qualification-link":
-                qualification_count += 1
-            elif link_type == "contribution":
-                contribution_count += 1
+        needed_by_count = len(self.xml_service.links_of_kind(NEEDED_BY))
+        qualification_count = len(self.xml_service.links_of_kind(QUALIFICATION_LINK))
+        contribution_count = len(self.xml_service.links_of_kind(CONTRIBUTION))
 
         metrics["internal_links"] = {
             "needed_by": needed_by_count,
@@ -69,11 +65,10 @@ class IstarMetricsService:
             "contributions": contribution_count,
         }
 
-        refinements = self.xml_service.get_refinements()
         and_count = 0
         or_count = 0
 
-        for ref in refinements.values():
+        for ref in self.xml_service.links_of_kind(REFINEMENT):
             kind = (ref.get("value") or "").strip().lower()
             if kind == "and":
                 and_count += 1
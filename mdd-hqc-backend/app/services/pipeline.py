@@ -0,0 +1,569 @@
+"""Pipeline stages shared by the transformation and metrics endpoints."""
+
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
+
+from pydantic import BaseModel, ConfigDict
+
+from app.core.cache import LruCache
+from app.core.config import config
+from app.core.executors import run_in_cpu_executor, run_in_io_executor
+from app.core.hashing import file_content_hash
+from app.core.storage import artifact_dir, schedule_artifact_write
+from app.models.uml import UmlModel
+from app.models.uvl import UVL
+from app.services.artifacts.plantuml_service import PlantumlService
+from app.services.artifacts.uvl_service import UvlService
+from app.services.artifacts.xml_service import load_istar_model
+from app.services.metrics.istar_metrics import IstarMetricsService
+from app.services.metrics.uml_metrics import UmlMetricsService
+from app.services.metrics.uvl_metrics import UvlMetricsService
+from app.services.transformations.cim_to_pim import CimToPim
+from app.services.transformations.pim_to_psm import PimToPsm
+
+logger = logging.getLogger(__name__)
+
+# ------------ Artifact Names ------------
+# File names used inside each content-addressed artifact directory.
+UVL_ARTIFACT_NAME = "model.uvl"
+PUML_ARTIFACT_NAME = "model.puml"
+
+# ------------ Stage Names ------------
+# Ordered top-level stages reported to progress callbacks by each flow.
+PIM_STAGES: Tuple[str, ...] = ("hash", "cim_to_pim", "uvl_artifact")
+PSM_STAGES: Tuple[str, ...] = PIM_STAGES + ("pim_to_psm", "plantuml", "puml_artifact")
+
+# ------------ Response Versions ------------
+# NOTE: bump when response fields or metrics change, so clients drop cached ETags.
+PIPELINE_VERSION = "1"
+
+# ------------ Flow Kinds ------------
+# Flows that jobs and batches can run, named after the synchronous endpoints.
+FlowKind = Literal["cim-to-pim", "pim-to-psm"]
+
+FLOW_STAGES: Dict[str, Tuple[str, ...]] = {
+    "cim-to-pim": PIM_STAGES,
+    "pim-to-psm": PSM_STAGES,
+}
+
+
+class StageTiming(BaseModel):
+    """Stores the duration of one step measured inside a CPU stage.
+
+    CPU stages run on worker processes, so their steps are timed there and reported
+    to progress callbacks once the stage returns.
+    """
+
+    step: str
+    elapsed_ms: float
+
+
+class StageEvent(BaseModel):
+    """Represents the start or completion of one pipeline stage or step.
+
+    Steps inside a CPU stage, such as one CIM-to-PIM rule, use dotted names like
+    `cim_to_pim.r2` and are only reported as completed. `cached` marks results reused
+    from the stage cache, whose step timings belong to the run that produced them.
+    """
+
+    stage: str
+    status: Literal["started", "completed"]
+    elapsed_ms: Optional[float] = None
+    cached: bool = False
+    metrics: Optional[Dict[str, Any]] = None
+    artifact: Optional[str] = None
+
+
+# Callback invoked with every stage event of one flow, in order.
+StageCallback = Callable[[StageEvent], None]
+
+# ------------ Stage Cache ------------
+# Stage outputs keyed by input content hash plus the versions of the rules applied.
+# Entries are weighed by the length of the text they render, see `_run_cached_stage`.
+pipeline_stage_cache = LruCache(
+    name="pipeline_stages",
+    max_entries=config.PIPELINE_CACHE_MAX_ENTRIES,
+    max_bytes=config.PIPELINE_CACHE_MAX_BYTES,
+)
+
+
+class PimStageResult(BaseModel):
+    """Stores the in-memory outputs of the CIM-to-PIM stage.
+
+    The record travels back from the CPU executor and is kept in the stage cache, so
+    the UVL model can be transformed again and its rendered text returned without
+    rerunning the rules or reading a file back.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    uvl: UVL
+    uvl_text: str
+    istar_metrics: Dict[str, Any]
+    uvl_metrics: Dict[str, Any]
+    timings: List[StageTiming] = []
+
+
+class UmlStageResult(BaseModel):
+    """Stores the in-memory outputs of the PIM-to-PSM stage.
+
+    The record is cached separately from the PIM stage, so a later request for the
+    same model resumes from the UML model instead of from the UVL model.
+    """
+
+    uml_model: UmlModel
+    uml_metrics: Dict[str, Any]
+    timings: List[StageTiming] = []
+
+
+class PimPipelineResult(BaseModel):
+    """Groups the PIM stage output with its UVL text and artifact path.
+
+    The UVL path is content-addressed, so concurrent jobs over different inputs never
+    share it and jobs over the same input write the same content. The path is None
+    when artifacts are not persisted.
+    """
+
+    pim: PimStageResult
+    uvl_path: Optional[Path]
+    uvl_content: str
+
+    def to_payload(
+        self, input_path: str, include_content: bool = True
+    ) -> Dict[str, Any]:
+        """Returns the response fields shared by the endpoint and the job API.
+
+        Without `include_content` the artifact texts are left out, so the payload only
+        holds links and metrics.
+        """
+        payload = {
+            "input_xml": input_path,
+            "output_uvl": _artifact_link(self.uvl_path),
+            "uvl_content": self.uvl_content,
+            "metrics": {
+                "cim": self.pim.istar_metrics,
+                "pim": self.pim.uvl_metrics,
+            },
+        }
+        if not include_content:
+            del payload["uvl_content"]
+        return payload
+
+
+class PsmPipelineResult(PimPipelineResult):
+    """Groups the stage outputs and artifact paths of the full PIM-to-PSM flow.
+
+    Each stage may come from the stage cache or from a fresh run, so callers never need
+    to know how deep the cached pipeline was.
+    """
+
+    uml: UmlStageResult
+    puml_text: str
+    puml_path: Optional[Path]
+
+    def to_payload(
+        self, input_path: str, include_content: bool = True
+    ) -> Dict[str, Any]:
+        """Returns the response fields shared by the endpoint and the job API.
+
+        Without `include_content` the artifact texts are left out, so the payload only
+        holds links and metrics.
+        """
+        payload = {
+            "input_xml": input_path,
+            "output_uvl": _artifact_link(self.uvl_path),
+            "output_puml": _artifact_link(self.puml_path),
+            "uvl_content": self.uvl_content,
+            "puml_content": self.puml_text,
+            "metrics": {
+                "cim": self.pim.istar_metrics,
+                "pim": self.pim.uvl_metrics,
+                "psm": self.uml.uml_metrics,
+            },
+        }
+        if not include_content:
+            del payload["uvl_content"], payload["puml_content"]
+        return payload
+
+
+# ====== Private Helpers ======
+# Internal functions below key and resume cached pipeline stages.
+
+
+def _artifact_link(path: Optional[Path]) -> Optional[str]:
+    """Returns the response value of one artifact path, or None when not persisted."""
+    return str(path) if path is not None else None
+
+
+def _persist_artifact(
+    key: Tuple[str, ...], file_name: str, content: str
+) -> Optional[Path]:
+    """Schedules the write of one artifact and returns its path.
+
+    Returns None without writing when `ARTIFACTS_PERSIST` is disabled, so responses
+    carry the in-memory content only.
+    """
+    if not config.ARTIFACTS_PERSIST:
+        return None
+    path = artifact_dir(key) / file_name
+    schedule_artifact_write(path, content)
+    return path
+
+
+# ------------ Stage Resolution ------------
+# Functions below return one stage output from the cache or compute and store it.
+async def _run_cached_stage(
+    key: Tuple[str, ...],
+    compute: Callable[[], Awaitable[Any]],
+    size_of: Callable[[Any], int],
+) -> Tuple[Any, bool]:
+    """Returns the output of one stage and whether it came from the cache.
+
+    Cached outputs are shared between requests, so callers must treat them as
+    read-only. `size_of` weighs a fresh output for the byte budget of the cache from
+    the text it renders: the text itself, plus the same again for a model object.
+    """
+    cached = pipeline_stage_cache.get(key)
+    if cached is not None:
+        logger.debug("Pipeline stage cache hit: stage=%s, key=%s", key[0], key[1])
+        return cached, True
+
+    logger.debug("Pipeline stage cache miss: stage=%s, key=%s", key[0], key[1])
+    value = await compute()
+    pipeline_stage_cache.put(key, value, size=size_of(value))
+    return value, False
+
+
+# ------------ Progress Events ------------
+# Functions below time stages and report them to the optional progress callback.
+def _emit(on_stage: Optional[StageCallback], event: StageEvent) -> None:
+    """Sends one event to the progress callback when the caller provided one."""
+    if on_stage is not None:
+        on_stage(event)
+
+
+@contextmanager
+def _report_stage(
+    on_stage: Optional[StageCallback], stage: str
+) -> Iterator[Dict[str, Any]]:
+    """Emits the start and completion events of one stage around the wrapped block.
+
+    The block fills the yielded dict with extra `StageEvent` fields for the completion
+    event. No completion event is emitted when the block raises.
+    """
+    _emit(on_stage, StageEvent(stage=stage, status="started"))
+    fields: Dict[str, Any] = {}
+    start = time.perf_counter()
+    yield fields
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+    _emit(
+        on_stage,
+        StageEvent(stage=stage, status="completed", elapsed_ms=elapsed_ms, **fields),
+    )
+
+
+def _report_steps(
+    on_stage: Optional[StageCallback],
+    stage: str,
+    timings: List[StageTiming],
+    cached: bool,
+) -> None:
+    """Emits one completion event per step timed inside a CPU stage.
+
+    Fresh timings are also logged in one line, so slow rules show up in the backend
+    logs without a streaming client.
+    """
+    for timing in timings:
+        _emit(
+            on_stage,
+            StageEvent(
+                stage=f"{stage}.{timing.step}",
+                status="completed",
+                elapsed_ms=timing.elapsed_ms,
+                cached=cached,
+            ),
+        )
+    if not cached:
+        logger.info(
+            "Pipeline stage timed: stage=%s, %s",
+            stage,
+            ", ".join(f"{t.step}={t.elapsed_ms}ms" for t in timings),
+        )
+
+
+def _timed_step(
+    timings: List[StageTiming], step: str, func: Callable[..., Any], *args: Any
+) -> Any:
+    """Runs one step of a CPU stage, appends its duration, and returns its result."""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+    timings.append(StageTiming(step=step, elapsed_ms=elapsed_ms))
+    return result
+
+
+def _pim_stage_key(xml_hash: str) -> Tuple[str, ...]:
+    """Returns the cache key of the UVL model derived from one XML content hash."""
+    return ("pim", xml_hash, CimToPim.RULESET_VERSION)
+
+
+def _uml_stage_key(xml_hash: str) -> Tuple[str, ...]:
+    """Returns the cache key of the UML model derived from one XML content hash."""
+    return (
+        "uml",
+        xml_hash,
+        CimToPim.RULESET_VERSION,
+        PimToPsm.RULESET_VERSION,
+    )
+
+
+def _puml_stage_key(xml_hash: str) -> Tuple[str, ...]:
+    """Returns the cache key of the PlantUML text derived from one XML content hash."""
+    return (
+        "puml",
+        xml_hash,
+        CimToPim.RULESET_VERSION,
+        PimToPsm.RULESET_VERSION,
+        PlantumlService.RENDERER_VERSION,
+    )
+
+
+# ------------ Flow Stages ------------
+# Functions below run the stages shared by the public flows.
+async def _hash_input(
+    input_path: str, xml_hash: Optional[str], on_stage: Optional[StageCallback]
+) -> str:
+    """Reports the hash stage and returns the content hash of one XML file.
+
+    The file is only hashed when `xml_hash` is None.
+    """
+    with _report_stage(on_stage, "hash"):
+        if xml_hash is None:
+            xml_hash = await run_in_io_executor(file_content_hash, input_path)
+    return xml_hash
+
+
+async def _run_pim_stage(
+    input_path: str, pim_key: Tuple[str, ...]
+) -> Tuple[PimStageResult, bool]:
+    """Returns the cached CIM-to-PIM stage of one XML file, or runs it on the CPU pool."""
+    return await _run_cached_stage(
+        pim_key,
+        lambda: run_in_cpu_executor(build_pim, input_path),
+        lambda pim: 2 * len(pim.uvl_text),
+    )
+
+
+async def _run_pim_stages(
+    input_path: str, xml_hash: str, on_stage: Optional[StageCallback]
+) -> PimPipelineResult:
+    """Runs the stages of `run_pim_stages` after the hash stage."""
+    pim_key = _pim_stage_key(xml_hash)
+
+    with _report_stage(on_stage, "cim_to_pim") as report:
+        pim, cached = await _run_pim_stage(input_path, pim_key)
+        _report_steps(on_stage, "cim_to_pim", pim.timings, cached)
+        report.update(
+            cached=cached, metrics={"cim": pim.istar_metrics, "pim": pim.uvl_metrics}
+        )
+
+    with _report_stage(on_stage, "uvl_artifact") as report:
+        uvl_path = _persist_artifact(pim_key, UVL_ARTIFACT_NAME, pim.uvl_text)
+        report.update(artifact=_artifact_link(uvl_path))
+
+    return PimPipelineResult(pim=pim, uvl_path=uvl_path, uvl_content=pim.uvl_text)
+
+
+# ====== Public API ======
+# Functions below are the executor-friendly stages and the cached flows built on them.
+
+
+# ------------ Response Tags ------------
+# Functions below name one deterministic response without computing it.
+def response_etag(endpoint: str, input_path: str, xml_hash: str) -> str:
+    """Returns the weak ETag of one endpoint response over one XML content hash.
+
+    Responses are pure functions of the XML content, the rule and renderer versions,
+    the input path echoed back, and whether artifact paths are included, so the tag
+    folds in all of them. For example, editing the XML or bumping a `RULESET_VERSION`
+    changes the tag, while rerunning the same request keeps it. The tag is weak because
+    the gzip and identity encodings of one body share it; they are equivalent but not
+    byte-identical, which a strong tag would promise.
+    """
+    parts = (
+        PIPELINE_VERSION,
+        CimToPim.RULESET_VERSION,
+        PimToPsm.RULESET_VERSION,
+        PlantumlService.RENDERER_VERSION,
+        str(config.ARTIFACTS_PERSIST),
+        endpoint,
+        xml_hash,
+        input_path,
+    )
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+# ------------ CPU Stages ------------
+# Stages below parse and transform models; their inputs and outputs are picklable.
+def build_pim(input_path: str) -> PimStageResult:
+    """Parses one iStar XML file and applies the CIM-to-PIM rules in memory.
+
+    This stage runs on the CPU executor, so the parse cache it uses is the one of the
+    worker process that picks up the request. The parse, each rule, and each metrics
+    pass are timed into `timings`.
+    """
+    timings: List[StageTiming] = []
+    xml_service = _timed_step(timings, "parse", load_istar_model, input_path)
+    uvl = UVL()
+
+    istar_metrics = _timed_step(
+        timings, "cim_metrics", IstarMetricsService(xml_service).calculate
+    )
+
+    cim_to_pim = CimToPim(xml_service=xml_service, uvl_service=UvlService(), uvl=uvl)
+    for rule in CimToPim.RULE_ORDER:
+        _timed_step(timings, rule, cim_to_pim.apply_rule, rule)
+
+    uvl_metrics = _timed_step(timings, "pim_metrics", UvlMetricsService(uvl).calculate)
+    uvl_text = _timed_step(timings, "uvl_render", uvl.render)
+
+    return PimStageResult(
+        uvl=uvl,
+        uvl_text=uvl_text,
+        istar_metrics=istar_metrics,
+        uvl_metrics=uvl_metrics,
+        timings=timings,
+    )
+
+
+def build_uml(uvl: UVL) -> UmlStageResult:
+    """Applies the PIM-to-PSM rules to one UVL model in memory.
+
+    This stage starts from the UVL model, so it can resume from a cached PIM stage
+    without parsing the XML again. Each rule and the metrics pass are timed into
+    `timings`.
+    """
+    timings: List[StageTiming] = []
+    pim_to_psm = PimToPsm(uvl)
+    for rule in PimToPsm.RULE_ORDER:
+        _timed_step(timings, rule, pim_to_psm.apply_rule, rule)
+    uml_model = pim_to_psm.uml
+
+    uml_metrics = _timed_step(
+        timings, "psm_metrics", UmlMetricsService(uml_model).calculate
+    )
+    return UmlStageResult(uml_model=uml_model, uml_metrics=uml_metrics, timings=timings)
+
+
+# ------------ Cached Flows ------------
+# Flows below resume from the deepest cached stage of one input file.
+async def run_cim_metrics(
+    input_path: str, xml_hash: Optional[str] = None
+) -> Dict[str, Any]:
+    """Returns the CIM metrics of one XML file from its CIM-to-PIM stage.
+
+    The stage computes these metrics right after parsing, so serving them from it
+    parses each XML content once, in the CPU worker that runs the stage, whether
+    `/metrics/cim` or a transformation asks first. The returned dict is shared with
+    the stage cache and must be treated as read-only.
+    """
+    if xml_hash is None:
+        xml_hash = await run_in_io_executor(file_content_hash, input_path)
+    pim, _ = await _run_pim_stage(input_path, _pim_stage_key(xml_hash))
+    return pim.istar_metrics
+
+
+async def run_pim_stages(
+    input_path: str,
+    on_stage: Optional[StageCallback] = None,
+    xml_hash: Optional[str] = None,
+) -> PimPipelineResult:
+    """Returns the PIM stage of one XML file and its UVL artifact.
+
+    A cached run over the same XML content is reused. The UVL text comes from memory
+    and its file is written in the background to the artifact directory of the PIM
+    stage key, so the result never waits for the disk. `on_stage` receives the events of
+    each stage in `PIM_STAGES` and of each step timed inside the CIM-to-PIM stage.
+    Callers that already hashed the file pass `xml_hash`, so it is not hashed again.
+    """
+    xml_hash = await _hash_input(input_path, xml_hash, on_stage)
+    return await _run_pim_stages(input_path, xml_hash, on_stage)
+
+
+async def run_psm_stages(
+    input_path: str,
+    on_stage: Optional[StageCallback] = None,
+    xml_hash: Optional[str] = None,
+) -> PsmPipelineResult:
+    """Returns every stage of the PIM-to-PSM flow, resuming from the deepest cached one.
+
+    A request that follows `/transformations/cim-to-pim` on the same XML skips the
+    parse and the CIM-to-PIM rules, and a repeated request skips every stage.
+    `on_stage` receives the events of each stage in `PSM_STAGES` and of each step
+    timed inside the two transformation stages. The file is hashed once for both
+    flows, or not at all when the caller passes `xml_hash`.
+    """
+    xml_hash = await _hash_input(input_path, xml_hash, on_stage)
+    pim_result = await _run_pim_stages(input_path, xml_hash, on_stage)
+    puml_key = _puml_stage_key(xml_hash)
+
+    with _report_stage(on_stage, "pim_to_psm") as report:
+        uml, cached = await _run_cached_stage(
+            _uml_stage_key(xml_hash),
+            lambda: run_in_cpu_executor(build_uml, pim_result.pim.uvl),
+            lambda _: len(pim_result.uvl_content),
+        )
+        _report_steps(on_stage, "pim_to_psm", uml.timings, cached)
+        report.update(cached=cached, metrics={"psm": uml.uml_metrics})
+
+    with _report_stage(on_stage, "plantuml") as report:
+        puml_text, cached = await _run_cached_stage(
+            puml_key,
+            lambda: run_in_io_executor(PlantumlService().render, uml.uml_model),
+            len,
+        )
+        report.update(cached=cached)
+
+    with _report_stage(on_stage, "puml_artifact") as report:
+        puml_path = _persist_artifact(puml_key, PUML_ARTIFACT_NAME, puml_text)
+        report.update(artifact=_artifact_link(puml_path))
+
+    return PsmPipelineResult(
+        pim=pim_result.pim,
+        uvl_path=pim_result.uvl_path,
+        uvl_content=pim_result.uvl_content,
+        uml=uml,
+        puml_text=puml_text,
+        puml_path=puml_path,
+    )
+
+
+async def run_flow(
+    kind: FlowKind,
+    input_path: str,
+    on_stage: Optional[StageCallback] = None,
+    xml_hash: Optional[str] = None,
+) -> PimPipelineResult:
+    """Runs the flow named by `kind` over one XML file and returns its result.
+
+    For example, `"pim-to-psm"` returns a `PsmPipelineResult`, the same value as
+    `run_psm_stages`.
+    """
+    if kind == "cim-to-pim":
+        return await run_pim_stages(input_path, on_stage=on_stage, xml_hash=xml_hash)
+    return await run_psm_stages(input_path, on_stage=on_stage, xml_hash=xml_hash)
@@ -1,9 +1,16 @@
 """CIM->PIM transformation rules from i* models into the HQC UVL model."""
 
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel
-from app.models.istar import IstarModel
+from app.models.istar import (
+    CONTRIBUTION,
+    NEEDED_BY,
+    QUALIFICATION_LINK,
+    REFINEMENT,
+    SOCIAL_DEPENDENCY,
+    IstarModel,
+)
 from app.models.uvl import UVL
 from app.services.artifacts.uvl_service import UvlService
 
@@ -29,6 +36,12 @@ class CimToPim:
     model required by the next stages of the backend pipeline.
     """
 
+    # NOTE: Bump whenever the CIM-to-PIM rules or the UVL keyword catalog change, so cached stage outputs are not reused.
+    RULESET_VERSION = "1"
+
+    # Order in which the rules must run; R3 needs the features created by R2, R4 and R5.
+    RULE_ORDER: Tuple[str, ...] = ("r1", "r2", "r4", "r5", "r3")
+
     def __init__(self, xml_service: IstarModel, uvl_service: UvlService, uvl: UVL):
         """Initializes the transformer with the parsed i* model and UVL services.
 
@@ -191,29 +204,21 @@ class CimToPim:
         pairs: List[Dict[str, str]] = []
         resources = self.xml_service.get_intentional_element_by_type("resource")
         outgoing_by_resource: Dict[str, List[str]] = {}
-        incoming_by_resource: Dict[str, List[str]] = {}
 
-        for link in self.xml_service.get_social_dependencies().values():
-            source_id = link.get("source")
-            target_id = link.get("target")
-            if not source_id or not target_id:
+        for link in self.xml_service.links_of_kind(SOCIAL_DEPENDENCY):
+            endpoints = self._get_link_endpoints(link)
+            if endpoints is None:
                 continue
+            source_id, target_id = endpoints
 
             if (
                 target_id in resources
                 and self._get_existing_feature_location(source_id) is not None
             ):
                 outgoing_by_resource.setdefault(target_id, []).append(source_id)
-                continue
-
-            if (
-                source_id in resources
-                and self._get_existing_feature_location(target_id) is not None
-            ):
-                incoming_by_resource.setdefault(source_id, []).append(target_id)
 
         for resource_id, source_ids in outgoing_by_resource.items():
-            target_ids = incoming_by_resource.get(resource_id, [])
+            target_ids = self._get_resource_dependee_ids(resource_id, resources)
             for source_id in source_ids:
                 for target_id in target_ids:
                     if source_id == target_id:
@@ -222,6 +227,29 @@ class CimToPim:
 
         return pairs
 
+    def _get_resource_dependee_ids(self, resource_id: str, resources) -> List[str]:
+        """Returns the located dependees reached from one resource for R4.
+
+        This helper follows only the social dependencies leaving the resource, skipping
+        the ones already counted as dependers of another resource.
+        """
+        target_ids: List[str] = []
+        resource_is_located = (
+            self._get_existing_feature_location(resource_id) is not None
+        )
+
+        for link in self.xml_service.links_from(resource_id, SOCIAL_DEPENDENCY):
+            target_id = link.get("target")
+            if not target_id:
+                continue
+            if target_id in resources and resource_is_located:
+                continue
+            if self._get_existing_feature_location(target_id) is None:
+                continue
+            target_ids.append(target_id)
+
+        return target_ids
+
     def _get_link_endpoints(self, link: dict) -> Optional[tuple[str, str]]:
         """Returns valid source and target ids for one link when both exist.
 
@@ -243,10 +271,7 @@ class CimToPim:
         resources = self.xml_service.get_intentional_element_by_type("resource")
         tasks = self.xml_service.get_intentional_element_by_type("task")
 
-        for link in self.xml_service.get_internal_links().values():
-            if link.get("type") != "needed-by":
-                continue
-
+        for link in self.xml_service.links_of_kind(NEEDED_BY):
             endpoints = self._get_link_endpoints(link)
             if endpoints is None:
                 continue
@@ -288,10 +313,7 @@ class CimToPim:
         This helper preserves contribution semantics as feature metadata so later stages
         can still inspect the contribution intent after the transformation.
         """
-        for link in self.xml_service.get_internal_links().values():
-            if link.get("type") != "contribution":
-                continue
-
+        for link in self.xml_service.links_of_kind(CONTRIBUTION):
             endpoints = self._get_link_endpoints(link)
             if endpoints is None:
                 continue
@@ -322,7 +344,7 @@ class CimToPim:
         This helper maps refinement relations into UVL hierarchy groups so the generated
         PIM preserves structural decomposition choices from the source model.
         """
-        for refinement in self.xml_service.get_refinements().values():
+        for refinement in self.xml_service.links_of_kind(REFINEMENT):
             endpoints = self._get_link_endpoints(refinement)
             if endpoints is None:
                 continue
@@ -358,6 +380,20 @@ class CimToPim:
     # ------------ Transformation Rules ------------
     # Methods below apply the ordered rules that build the UVL model from the i* input.
 
+    def apply_rule(self, rule: str) -> None:
+        """Applies one rule of `RULE_ORDER` by name.
+
+        Callers that time or report each rule run them through this method, so the
+        rule order stays defined in one place.
+        """
+        getattr(self, f"apply_{rule}")()
+
+    def transform(self) -> UVL:
+        """Runs every CIM-to-PIM rule in the required order and returns the UVL model."""
+        for rule in self.RULE_ORDER:
+            self.apply_rule(rule)
+        return self.uvl
+
     def apply_r1(self) -> None:
         """Applies rule R1 by loading actor ownership for later traceability comments.
 
@@ -402,10 +438,7 @@ class CimToPim:
         if not qualities:
             qualities = self.xml_service.get_intentional_element_by_type("softgoal")
 
-        for link in self.xml_service.get_internal_links().values():
-            if link.get("type") != "qualification-link":
-                continue
-
+        for link in self.xml_service.links_of_kind(QUALIFICATION_LINK):
             source_id = link.get("source")
             target_id = link.get("target")
             if not source_id or not target_id:
@@ -1,7 +1,7 @@
 """PIM->PSM transformation rules from UVL models into the HQC UML model."""
 
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel
 from app.models.uml import UmlClass, UmlMethod, UmlModel
 from app.models.uvl import Feature, UVL
@@ -27,6 +27,12 @@ class PimToPsm:
     methods, attributes, and annotations needed by the final PSM representation.
     """
 
+    # NOTE: Bump whenever the PIM-to-PSM rules change, so cached stage outputs are not reused.
+    RULESET_VERSION = "1"
+
+    # Order in which the rules must run; R1 and R5 read the classes created by the others.
+    RULE_ORDER: Tuple[str, ...] = ("r2", "r3", "r4", "r6", "r7", "r8", "r1", "r5")
+
     def __init__(self, uvl: UVL):
         """Initializes the transformer with the source UVL model.
 
@@ -273,10 +279,7 @@ class PimToPsm:
         if helper_location is None:
             return
 
-        for child_name, parent_name in self.uvl.parent_by_child.items():
-            if parent_name != helper_feature.name:
-                continue
-
+        for child_name in self.uvl.get_child_names(helper_feature.name):
             child_feature = self._get_existing_feature(child_name)
             if child_feature is None:
                 continue
@@ -535,18 +538,20 @@ class PimToPsm:
 
         logger.debug("PIM-to-PSM R8 applied: feature groups copied as UML annotations")
 
+    def apply_rule(self, rule: str) -> None:
+        """Applies one rule of `RULE_ORDER` by name.
+
+        Callers that time or report each rule run them through this method, so the
+        rule order stays defined in one place.
+        """
+        getattr(self, f"apply_{rule}")()
+
     def transform(self) -> UmlModel:
         """Runs the full PIM-to-PSM rule pipeline and returns the generated UML model.
 
         This method applies the rules in the required order so the final UML model is
         complete before rendering or metric calculations use it.
         """
-        self.apply_r2()
-        self.apply_r3()
-        self.apply_r4()
-        self.apply_r6()
-        self.apply_r7()
-        self.apply_r8()
-        self.apply_r1()
-        self.apply_r5()
+        for rule in self.RULE_ORDER:
+            self.apply_rule(rule)
         return self.uml
@@ -1,37 +1,349 @@
 """Services that validate and persist uploaded XML artifacts."""
 
+import hashlib
 import logging
-import shutil
+import os
+import tempfile
+import xml.etree.ElementTree as ET
 from pathlib import Path
-from fastapi import UploadFile
+from typing import IO, Any, AsyncIterator, Dict, List, Mapping, Optional
+
+from pydantic import BaseModel
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.config import config
+from app.core.executors import run_in_cpu_executor, run_in_io_executor
+from app.core.hashing import remember_content_hash
+from app.core.storage import ARTIFACT_FILE_MODE
+from app.services.artifacts.xml_service import (
+    DRAWIO_ROOT_TAGS,
+    XmlService,
+    load_istar_index,
+    persist_istar_index,
+    read_root_tag,
+)
+from app.services.metrics.istar_metrics import IstarMetricsService
 
 logger = logging.getLogger(__name__)
 
+# ------------ Upload Limits ------------
+# Room left for multipart boundaries and part headers when checking `Content-Length`.
+MULTIPART_OVERHEAD_BYTES = 16_384
+
+# Buffered file bytes that trigger one hash-and-write call on the I/O executor.
+WRITE_BATCH_BYTES = 1_048_576
+
+
+class UploadTooLargeError(ValueError):
+    """Raised as soon as an upload is known to exceed `UPLOAD_MAX_BYTES`."""
+
+
+class UploadValidationError(ValueError):
+    """Raised when a pre-indexed upload is not a well-formed draw.io iStar model."""
+
+
+class UploadResult(BaseModel):
+    """Describes one stored upload.
+
+    `id` is the SHA-256 of the content and names the stored file, so it matches the
+    content hash that keys the pipeline caches and artifacts of this upload.
+    """
+
+    id: str
+    path: Path
+    filename: str
+    size: int
+    deduplicated: bool
+    cim_metrics: Optional[Dict[str, Any]] = None
+
+
+def preindex_upload(
+    file_path: str, content_hash: str, stored_path: str
+) -> Dict[str, Any]:
+    """Validates one uploaded file as an iStar model and persists its parsed indexes.
+
+    Runs on the CPU executor over the temporary file, which is parsed directly so no
+    cache keeps an entry for its short-lived path. The file must be well-formed XML
+    with a draw.io root tag and at least one iStar node. The parsed model, pointing at
+    `stored_path`, and its CIM metrics are pickled under the content hash, so the first
+    transformation loads them instead of parsing the XML. A content already
+    pre-indexed returns its persisted metrics without parsing.
+    """
+    persisted = load_istar_index(file_path, content_hash)
+    if persisted is not None:
+        return persisted.cim_metrics
+
+    try:
+        root_tag = read_root_tag(file_path)
+    except ET.ParseError as exc:
+        raise UploadValidationError(f"El archivo XML está mal formado: {exc}") from exc
+    if root_tag not in DRAWIO_ROOT_TAGS:
+        raise UploadValidationError(
+            f"El archivo no es un diagrama de draw.io: root_tag={root_tag}"
+        )
+
+    try:
+        model = XmlService(
+            file_path,
+            streaming=config.XML_STREAMING_LOADER,
+            parallel=config.XML_PARALLEL_PAGES,
+        )
+    except (ET.ParseError, ValueError) as exc:
+        raise UploadValidationError(
+            f"El archivo no es un modelo iStar válido: {exc}"
+        ) from exc
+
+    cim_metrics = IstarMetricsService(model).calculate()
+    if not cim_metrics["total_nodes"]:
+        raise UploadValidationError("El archivo no contiene elementos iStar")
+
+    model.file_path = stored_path
+    persist_istar_index(content_hash, model, cim_metrics)
+    return cim_metrics
+
+
+class _FilePart:
+    """Collects the state of the uploaded file part while the body streams in."""
+
+    def __init__(self, filename: str):
+        """Initializes an empty part whose temporary file is opened on first write."""
+        self.filename = filename
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        self.temp_path: Optional[Path] = None
+        self.temp_file: Optional[IO[bytes]] = None
+
 
 class UploadService:
     """Stores uploaded XML models on disk so they can be processed later.
 
     This service is used by the file API to validate upload format and persist the XML
-    artifact before parsing or transformation begins.
+    artifact before parsing or transformation begins. Files are stored under their
+    content hash, so uploading the same model twice keeps one file and one parse.
     """
 
-    BASE_DIR = Path("data")
+    BASE_DIR = Path(config.UPLOADS_DIR)
+    FILE_FIELD = "file"
+
+    # ====== Private Helpers ======
+    # Internal methods below parse the multipart stream and move the file into place.
 
-    async def upload_file(self, uploaded_file: UploadFile) -> Path:
-        """Validates one uploaded XML file and writes it into the local data directory.
+    # ------------ Multipart Parsing ------------
+    # Methods below build the parser callbacks that route file bytes to the part.
+    def _build_parser(self, boundary: bytes, parts: List[_FilePart]) -> MultipartParser:
+        """Returns a multipart parser that appends file bytes to the part in `parts`.
 
-        This method handles the persistence step of the upload flow so later backend
-        services can parse the saved XML from a known location.
+        Fields other than `file` are ignored. The extension is checked as soon as the
+        part headers arrive and the size on every chunk, so bad uploads are rejected
+        before the rest of the body is read.
         """
-        self.validate_extension(uploaded_file.filename)
-        self.BASE_DIR.mkdir(parents=True, exist_ok=True)
-
-        filename = uploaded_file.filename or "model.xml"
-        dest_path = self.BASE_DIR / filename
-        with dest_path.open("wb") as buffer:
-            shutil.copyfileobj(uploaded_file.file, buffer)
-        logger.info("File saved to disk: path=%s", dest_path)
-        return dest_path
+        headers: dict = {}
+        current: List[Optional[_FilePart]] = [None]
+        header_name = bytearray()
+        header_value = bytearray()
+
+        def on_part_begin() -> None:
+            headers.clear()
+            current[0] = None
+
+        def on_header_field(data: bytes, start: int, end: int) -> None:
+            header_name.extend(data[start:end])
+
+        def on_header_value(data: bytes, start: int, end: int) -> None:
+            header_value.extend(data[start:end])
+
+        def on_header_end() -> None:
+            headers[bytes(header_name).lower()] = bytes(header_value)
+            header_name.clear()
+            header_value.clear()
+
+        def on_headers_finished() -> None:
+            _, options = parse_options_header(headers.get(b"content-disposition", b""))
+            name = options.get(b"name", b"").decode("utf-8", "replace")
+            if name != self.FILE_FIELD or b"filename" not in options:
+                return
+            if parts:
+                raise ValueError("Solo se permite un archivo por solicitud")
+            filename = options[b"filename"].decode("utf-8", "replace")
+            self.validate_extension(filename)
+            current[0] = _FilePart(filename)
+            parts.append(current[0])
+
+        def on_part_data(data: bytes, start: int, end: int) -> None:
+            part = current[0]
+            if part is None:
+                return
+            part.size += end - start
+            self._check_size(part.size)
+            part.pending.append(bytes(data[start:end]))
+            part.pending_bytes += end - start
+
+        callbacks = {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+        }
+        return MultipartParser(boundary, callbacks)
+
+    def _check_size(self, size: int) -> None:
+        """Rejects an upload whose size exceeds `UPLOAD_MAX_BYTES`."""
+        if size > config.UPLOAD_MAX_BYTES:
+            raise UploadTooLargeError(
+                f"El archivo supera el tamaño máximo: max_bytes={config.UPLOAD_MAX_BYTES}"
+            )
+
+    # ------------ Disk Writes ------------
+    # Methods below write the part to disk; the streaming path runs them on the I/O executor.
+    def _write_pending(self, part: _FilePart) -> None:
+        """Hashes and appends the buffered chunks of one part to its temporary file."""
+        if part.temp_file is None:
+            self.BASE_DIR.mkdir(parents=True, exist_ok=True)
+            fd, temp_name = tempfile.mkstemp(
+                dir=self.BASE_DIR, prefix=".upload.", suffix=".tmp"
+            )
+            os.fchmod(fd, ARTIFACT_FILE_MODE)
+            part.temp_path = Path(temp_name)
+            part.temp_file = os.fdopen(fd, "wb")
+
+        chunks, part.pending, part.pending_bytes = part.pending, [], 0
+        for chunk in chunks:
+            part.hasher.update(chunk)
+            part.temp_file.write(chunk)
+
+    def _finish(self, part: _FilePart) -> str:
+        """Writes the last buffered chunks, closes the temporary file, and returns its hash."""
+        self._write_pending(part)
+        part.temp_file.close()
+        return part.hasher.hexdigest()
+
+    def _stored_path(self, digest: str) -> Path:
+        """Returns the content-addressed path an upload with this hash is stored at."""
+        return self.BASE_DIR / f"{digest}.xml"
+
+    def _store(self, part: _FilePart, digest: str) -> UploadResult:
+        """Moves the finished temporary file to its content-addressed path.
+
+        When a file with the same content is already stored, the new copy is dropped
+        and the existing file, with its cached parse, is reused.
+        """
+        dest_path = self._stored_path(digest)
+        deduplicated = dest_path.exists()
+        if deduplicated:
+            part.temp_path.unlink()
+        else:
+            os.replace(part.temp_path, dest_path)
+            remember_content_hash(str(dest_path), digest)
+        part.temp_path = None
+
+        return UploadResult(
+            id=digest,
+            path=dest_path,
+            filename=part.filename,
+            size=part.size,
+            deduplicated=deduplicated,
+        )
+
+    def _discard(self, part: _FilePart) -> None:
+        """Removes the temporary file of an upload that did not finish."""
+        if part.temp_file is not None:
+            part.temp_file.close()
+        if part.temp_path is not None:
+            part.temp_path.unlink(missing_ok=True)
+
+    # ------------ Pre-indexing ------------
+    # Methods below validate a finished upload before it reaches its stored path.
+    async def _preindex(self, temp_path: Path, content_hash: str) -> Dict[str, Any]:
+        """Validates and pre-indexes the temporary file of one upload.
+
+        Runs before the file is moved to its content-addressed path, so a rejected
+        upload only ever removes its own temporary file, never a stored file that a
+        concurrent upload of the same content may share. Raises `UploadValidationError`.
+        """
+        try:
+            cim_metrics = await run_in_cpu_executor(
+                preindex_upload,
+                str(temp_path),
+                content_hash,
+                str(self._stored_path(content_hash)),
+            )
+        except UploadValidationError as exc:
+            logger.warning(
+                "Upload failed validation: content_hash=%s, error=%s",
+                content_hash,
+                exc,
+            )
+            raise
+
+        logger.info(
+            "Upload pre-indexed: content_hash=%s, total_nodes=%s, total_links=%s",
+            content_hash,
+            cim_metrics.get("total_nodes"),
+            cim_metrics.get("total_links"),
+        )
+        return cim_metrics
+
+    # ====== Public API ======
+    # Methods below validate and store one uploaded file.
+
+    async def upload_stream(
+        self,
+        headers: Mapping[str, str],
+        body: AsyncIterator[bytes],
+        preindex: bool = False,
+    ) -> UploadResult:
+        """Streams one multipart upload to disk and returns where it was stored.
+
+        The body is parsed chunk by chunk while it arrives. File bytes are hashed and
+        written on the I/O executor in batches of `WRITE_BATCH_BYTES`, so the event
+        loop never blocks and memory stays flat. A `Content-Length` above the limit is rejected before reading the body,
+        and the limit is enforced again on the bytes actually received. With
+        `preindex`, the file is validated and pre-indexed before it is stored, and its
+        CIM metrics are returned in `cim_metrics`; an invalid file raises
+        `UploadValidationError` and is never stored.
+        """
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit():
+            self._check_size(int(content_length) - MULTIPART_OVERHEAD_BYTES)
+
+        content_type, options = parse_options_header(headers.get("content-type", ""))
+        boundary = options.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise ValueError("La solicitud debe ser multipart/form-data")
+
+        parts: List[_FilePart] = []
+        parser = self._build_parser(boundary, parts)
+        try:
+            async for chunk in body:
+                parser.write(chunk)
+                if parts and parts[0].pending_bytes >= WRITE_BATCH_BYTES:
+                    await run_in_io_executor(self._write_pending, parts[0])
+            parser.finalize()
+
+            if not parts:
+                raise ValueError("No se recibió ningún archivo")
+            digest = await run_in_io_executor(self._finish, parts[0])
+            cim_metrics = None
+            if preindex:
+                cim_metrics = await self._preindex(parts[0].temp_path, digest)
+            result = await run_in_io_executor(self._store, parts[0], digest)
+            result.cim_metrics = cim_metrics
+        except BaseException:
+            if parts:
+                self._discard(parts[0])
+            raise
+
+        logger.info(
+            "File saved to disk: path=%s, size=%s, deduplicated=%s",
+            result.path,
+            result.size,
+            result.deduplicated,
+        )
+        return result
 
     def validate_extension(self, uploaded_file):
         """Rejects uploaded files whose extension is different from `.xml`.